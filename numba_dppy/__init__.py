@@ -118,6 +118,15 @@ Intrinsic Functions:
     |                      |                            | CLK_LOCAL_MEM_FENCE  |
     |                      |                            | argument.            |
     +----------------------+----------------------------+----------------------+
+    | get_sub_group_       | get_sub_group_local_id     |                      |
+    | local_id             |                            |                      |
+    +----------------------+----------------------------+----------------------+
+    | get_sub_group_id     | get_sub_group_id           |                      |
+    +----------------------+----------------------------+----------------------+
+    | get_num_sub_groups   | get_num_sub_groups         |                      |
+    +----------------------+----------------------------+----------------------+
+    | sub_group_reduce_add | sub_group_reduce_add       |                      |
+    +----------------------+----------------------------+----------------------+
 
 
 Other Intrinsic Functions
@@ -462,10 +462,13 @@ class DPPYKernel(DPPYKernelBase):
         name,
         argtypes,
         ordered_arg_access_types=None,
+        spirv_bc=None,
     ):
         super(DPPYKernel, self).__init__()
         self._llvm_module = llvm_module
-        self.assembly = self.binary = llvm_module.__str__()
+        self.assembly = self.binary = (
+            llvm_module.__str__() if llvm_module is not None else None
+        )
         self.entry_name = name
         self.argument_types = tuple(argtypes)
         self.ordered_arg_access_types = ordered_arg_access_types
@@ -475,7 +478,7 @@ class DPPYKernel(DPPYKernelBase):
 
         dpctl_create_program_from_spirv_flags = []
         # First-time compilation using SPIRV-Tools
-        if config.DEBUG:
+        if config.DEBUG and self.binary is not None:
             with open("llvm_kernel.ll", "w") as f:
                 f.write(self.binary)
 
@@ -484,9 +487,13 @@ class DPPYKernel(DPPYKernelBase):
             # flags to igc.
             dpctl_create_program_from_spirv_flags = ["-g", "-cl-opt-disable"]
 
-        self.spirv_bc = spirv_generator.llvm_to_spirv(
-            self.context, self.assembly, self._llvm_module.as_bitcode()
-        )
+        # A kernel restored from the parfor kernel cache already has its
+        # SPIR-V binary and no LLVM module.
+        if spirv_bc is None:
+            spirv_bc = spirv_generator.llvm_to_spirv(
+                self.context, self.assembly, self._llvm_module.as_bitcode()
+            )
+        self.spirv_bc = spirv_bc
 
         # create a program
         self.program = dpctl_prog.create_program_from_spirv(
@@ -109,6 +109,25 @@ DEBUGINFO_DEFAULT = _readenv(
     "NUMBA_DPPY_DEBUGINFO", int, config.DEBUGINFO_DEFAULT
 )
 
+# Comma-separated names of the DPPY passes to dump the IR after, e.g.
+# "dppy_pre_parfor_pass,dppy_parfor_pass"
+DUMP_IR_PASSES = _readenv(
+    "NUMBA_DPPY_DUMP_IR_PASSES",
+    lambda value: frozenset(name.strip() for name in value.split(",")),
+    frozenset(),
+)
+
+# Store the SPIR-V of kernels compiled for parfors on disk and reuse it
+# across processes. The in-memory cache of parfor kernels is always enabled.
+CACHE_PARFOR_KERNELS_ON_DISK = _readenv(
+    "NUMBA_DPPY_CACHE_PARFOR_KERNELS_ON_DISK", int, 0
+)
+CACHE_DIR = _readenv(
+    "NUMBA_DPPY_CACHE_DIR",
+    str,
+    os.path.join(os.path.expanduser("~"), ".numba_dppy_cache"),
+)
+
 TESTING_SKIP_NO_DPNP = _readenv("NUMBA_DPPY_TESTING_SKIP_NO_DPNP", int, 0)
 TESTING_SKIP_NO_DEBUGGING = _readenv(
     "NUMBA_DPPY_TESTING_SKIP_NO_DEBUGGING", int, 1
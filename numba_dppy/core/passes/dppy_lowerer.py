@@ -13,42 +13,56 @@
 # limitations under the License.
 
 import ast
+import contextlib
 import copy
+import functools
+import hashlib
+import io
 import linecache
+import operator
 import os
+import pickle
+import re
 import sys
+import tempfile
 import warnings
 from collections import OrderedDict
+from ctypes import _CFuncPtr
+from types import CodeType, FunctionType, MappingProxyType, ModuleType
 
 import dpctl
 import numba
 import numpy as np
-from numba.core import compiler, funcdesc, ir, lowering, sigutils, types
+from numba.core import funcdesc, ir, lowering, sigutils, types
+from numba.core.bytecode import FunctionIdentity
+from numba.core.compiler import CompileResult
+from numba.core.dispatcher import _DispatcherBase
 from numba.core.errors import (
     NumbaParallelSafetyWarning,
     NumbaPerformanceWarning,
 )
 from numba.core.ir_utils import (
-    add_offset_to_labels,
     build_definitions,
     find_callname,
     find_potential_aliases,
     get_call_table,
     get_name_var_table,
     get_np_ufunc_typ,
-    get_unused_var_name,
     guard,
     is_const_call,
     is_pure,
     legalize_names,
     mk_unique_var,
     remove_dead,
-    remove_dels,
-    rename_labels,
     replace_var_names,
     visit_vars_inner,
 )
+from numba.core.postproc import PostProcessor
+from numba.core.types.abstract import Type
+from numba.core.types.functions import Dispatcher, Function
 from numba.core.typing import signature
+from numba.core.typing.templates import Signature
+from numba.np.ufunc.dufunc import DUFunc
 from numba.parfors import parfor
 from numba.parfors.parfor_lowering import _lower_parfor_parallel
 
@@ -56,10 +70,11 @@ import numba_dppy as dppy
 from numba_dppy import config
 from numba_dppy.dpctl_iface import KernelLaunchOps
 from numba_dppy.dppy_array_type import DPPYArray
+from numba_dppy.spirv_generator import CmdLine
 from numba_dppy.target import DPPYTargetContext
 from numba_dppy.utils import address_space, npytypes_array_to_dppy_array
 
-from .dufunc_inliner import dufunc_inliner
+from .dufunc_inliner import dufunc_inliner, has_dufunc_callsite
 
 
 def _print_block(block):
@@ -74,153 +89,388 @@ def _print_body(body_dict):
         _print_block(block)
 
 
+# Hoisting is disabled, all the parfors share the same read-only hoist info.
+_EMPTY_HOIST_INFO = MappingProxyType({"hoisted": (), "not_hoisted": ()})
+
+# Globals of the gufunc outline, shared by all the parfors.
+_GUFUNC_GLOBALS = {"__name__": __name__, "np": np, "numba": numba, "dppy": dppy}
+
+
+def _gufunc_stub():
+    return None
+
+
+def _make_gufunc_stub(gufunc_name, params, loc):
+    """Create a function object standing in for the gufunc outline.
+
+    The compilation pipeline needs a ``FunctionIdentity`` for the IR that is
+    built by ``_build_gufunc_ir``. Instead of generating and exec'ing the
+    Python source of the outline, the code object of an empty function is
+    reused with the name and the parameters of the gufunc, and with the
+    location ``loc`` of the parfor in the user's source.
+    """
+    code = _gufunc_stub.__code__.replace(
+        co_name=gufunc_name,
+        co_argcount=len(params),
+        co_nlocals=len(params),
+        co_varnames=tuple(params),
+        co_filename=loc.filename,
+        co_firstlineno=loc.line,
+    )
+    func = FunctionType(code, _GUFUNC_GLOBALS, gufunc_name)
+    func.__qualname__ = gufunc_name
+    return func
+
+
 # This loop scheduler is pretty basic, there is only
 # 3 dimension allowed in OpenCL, so to make the backend
 # functional we will schedule the first 3 dimensions
 # through OpenCL and generate for loops for the remaining
 # dimensions
-def _schedule_loop(parfor_dim, legal_loop_indices, loop_ranges, param_dict):
-    gufunc_txt = ""
-    global_id_dim = 0
-    for_loop_dim = parfor_dim
+def _build_gufunc_ir(
+    parfor_dim,
+    legal_loop_indices,
+    loop_ranges,
+    param_dict,
+    parfor_params,
+    loop_body,
+    body_labels,
+    loc,
+):
+    """Build the blocks of the gufunc outline and stitch in the parfor body.
+
+    The entry block binds the gufunc arguments and assigns
+    ``dppy.get_global_id(d)`` to the first three loop indices. Every
+    remaining dimension is iterated by an explicit loop around the parfor
+    body. ``body_labels`` holds the first and the last label of
+    ``loop_body``. The returned blocks are relabeled once to a contiguous
+    range with the entry block at the smallest label.
+    """
+    first_label, last_label = body_labels
+    scope = ir.Scope(None, loc)
+    blocks = {}
+    # The entry block must have the smallest label.
+    entry_label = first_label - 1
+    next_label = last_label + 1
+
+    entry_block = ir.Block(scope, loc)
+    for i, param in enumerate(parfor_params):
+        entry_block.append(
+            ir.Assign(ir.Arg(param, i, loc), ir.Var(scope, param, loc), loc)
+        )
 
     if parfor_dim > 3:
         global_id_dim = 3
     else:
         global_id_dim = parfor_dim
 
-    for eachdim in range(global_id_dim):
-        gufunc_txt += (
-            "    "
-            + legal_loop_indices[eachdim]
-            + " = "
-            + "dppy.get_global_id("
-            + str(eachdim)
-            + ")\n"
+    if global_id_dim:
+        dppy_var = ir.Var(scope, mk_unique_var("$dppy"), loc)
+        entry_block.append(
+            ir.Assign(ir.Global("dppy", dppy, loc), dppy_var, loc)
+        )
+        get_global_id_var = ir.Var(scope, mk_unique_var("$get_global_id"), loc)
+        entry_block.append(
+            ir.Assign(
+                ir.Expr.getattr(dppy_var, "get_global_id", loc),
+                get_global_id_var,
+                loc,
+            )
         )
 
-    for eachdim in range(global_id_dim, for_loop_dim):
-        for indent in range(1 + (eachdim - global_id_dim)):
-            gufunc_txt += "    "
+    for eachdim in range(global_id_dim):
+        dim_var = ir.Var(scope, mk_unique_var("$dim"), loc)
+        entry_block.append(ir.Assign(ir.Const(eachdim, loc), dim_var, loc))
+        index_var = ir.Var(scope, legal_loop_indices[eachdim], loc)
+        entry_block.append(
+            ir.Assign(
+                ir.Expr.call(get_global_id_var, [dim_var], (), loc),
+                index_var,
+                loc,
+            )
+        )
 
+    def range_value(v):
+        if isinstance(v, ir.Var):
+            return ir.Var(scope, param_dict[v.name], loc)
+        return ir.Const(v, loc)
+
+    return_label = next_label
+    next_label += 1
+
+    # Every dimension after the third one becomes a loop equivalent to
+    # ``for index in range(start, stop + 1)``. The block that is current
+    # when the loop is exhausted is the latch of the enclosing loop, or the
+    # return block for the outermost loop.
+    curr_block = entry_block
+    exit_label = return_label
+    for eachdim in range(global_id_dim, parfor_dim):
         start, stop, step = loop_ranges[eachdim]
-        start = param_dict.get(str(start), start)
-        stop = param_dict.get(str(stop), stop)
-        gufunc_txt += (
-            "for "
-            + legal_loop_indices[eachdim]
-            + " in range("
-            + str(start)
-            + ", "
-            + str(stop)
-            + " + 1):\n"
+        index_var = ir.Var(scope, legal_loop_indices[eachdim], loc)
+        stop_var = ir.Var(scope, mk_unique_var("$stop"), loc)
+        curr_block.append(ir.Assign(range_value(start), index_var, loc))
+        curr_block.append(ir.Assign(range_value(stop), stop_var, loc))
+
+        header_label, body_label, latch_label = range(
+            next_label, next_label + 3
+        )
+        next_label += 3
+        curr_block.append(ir.Jump(header_label, loc))
+
+        header_block = ir.Block(scope, loc)
+        cond_var = ir.Var(scope, mk_unique_var("$cond"), loc)
+        header_block.append(
+            ir.Assign(
+                ir.Expr.binop(operator.le, index_var, stop_var, loc),
+                cond_var,
+                loc,
+            )
+        )
+        header_block.append(
+            ir.Branch(cond_var, body_label, exit_label, loc)
+        )
+        blocks[header_label] = header_block
+
+        latch_block = ir.Block(scope, loc)
+        one_var = ir.Var(scope, mk_unique_var("$one"), loc)
+        latch_block.append(ir.Assign(ir.Const(1, loc), one_var, loc))
+        latch_block.append(
+            ir.Assign(
+                ir.Expr.binop(operator.add, index_var, one_var, loc),
+                index_var,
+                loc,
+            )
         )
+        latch_block.append(ir.Jump(header_label, loc))
+        blocks[latch_label] = latch_block
+
+        curr_block = ir.Block(scope, loc)
+        blocks[body_label] = curr_block
+        exit_label = latch_label
+
+    # Jump into the parfor body and from the end of the body to the latch of
+    # the innermost loop (or straight to the return block).
+    curr_block.append(ir.Jump(first_label, loc))
+    loop_body[last_label].append(ir.Jump(exit_label, loc))
+    blocks.update(loop_body)
+
+    # gufunc returns nothing
+    return_block = ir.Block(scope, loc)
+    none_var = ir.Var(scope, mk_unique_var("$none"), loc)
+    return_var = ir.Var(scope, mk_unique_var("$ret"), loc)
+    return_block.append(ir.Assign(ir.Const(None, loc), none_var, loc))
+    return_block.append(
+        ir.Assign(ir.Expr.cast(none_var, loc), return_var, loc)
+    )
+    return_block.append(ir.Return(return_var, loc))
+    blocks[return_label] = return_block
 
-    for eachdim in range(global_id_dim, for_loop_dim):
-        for indent in range(1 + (eachdim - global_id_dim)):
-            gufunc_txt += "    "
+    blocks[entry_label] = entry_block
+    return _relabel_blocks(blocks)
 
-    return gufunc_txt
+
+def _max_nested_parfor_label(blocks):
+    """Return the largest label used by a parfor nested in ``blocks``, or -1.
+
+    Nested parfors are shared with the host function, so their labels are
+    kept as they are and the labels of the gufunc must not reuse them.
+    """
+    max_label = -1
+    for block in blocks.values():
+        for inst in block.body:
+            if isinstance(inst, parfor.Parfor):
+                max_label = max(
+                    max_label,
+                    max(inst.loop_body),
+                    _max_nested_parfor_label(inst.loop_body),
+                )
+    return max_label
+
+
+def _relabel_blocks(blocks):
+    """Map the labels of ``blocks`` to a contiguous range preserving their
+    order. The range starts above the labels of any nested parfor, as these
+    blocks are added to the gufunc when the nested parfor is lowered.
+
+    The terminators are replaced rather than modified in place, as the
+    blocks of the parfor body share them with the parfor.
+    """
+    first_label = _max_nested_parfor_label(blocks) + 1
+    label_map = {
+        old: new for new, old in enumerate(sorted(blocks), first_label)
+    }
+    new_blocks = {}
+    for label, block in blocks.items():
+        term = block.body[-1] if block.body else None
+        if isinstance(term, ir.Jump):
+            block.body[-1] = ir.Jump(label_map[term.target], term.loc)
+        elif isinstance(term, ir.Branch):
+            block.body[-1] = ir.Branch(
+                term.cond,
+                label_map[term.truebr],
+                label_map[term.falsebr],
+                term.loc,
+            )
+        new_blocks[label_map[label]] = block
+    return new_blocks
 
 
 def _dbgprint_after_each_array_assignments(lowerer, loop_body, typemap):
+    number_domain = types.number_domain
+    calltypes = lowerer.fndesc.calltypes
     for label, block in loop_body.items():
-        new_block = block.copy()
-        new_block.clear()
+        new_body = []
         loc = block.loc
         scope = block.scope
         for inst in block.body:
-            new_block.append(inst)
+            new_body.append(inst)
             # Append print after assignment
-            if isinstance(inst, ir.Assign):
-                # Only apply to numbers
-                if typemap[inst.target.name] not in types.number_domain:
-                    continue
+            if not isinstance(inst, ir.Assign):
+                continue
 
-                # Make constant string
-                strval = "{} =".format(inst.target.name)
-                strconsttyp = types.StringLiteral(strval)
+            # Only apply to numbers
+            target_typ = typemap[inst.target.name]
+            if target_typ not in number_domain:
+                continue
 
-                lhs = ir.Var(scope, mk_unique_var("str_const"), loc)
-                assign_lhs = ir.Assign(
-                    value=ir.Const(value=strval, loc=loc), target=lhs, loc=loc
-                )
-                typemap[lhs.name] = strconsttyp
-                new_block.append(assign_lhs)
+            # Make constant string
+            strval = "{} =".format(inst.target.name)
+            strconsttyp = types.StringLiteral(strval)
 
-                # Make print node
-                print_node = ir.Print(
-                    args=[lhs, inst.target], vararg=None, loc=loc
-                )
-                new_block.append(print_node)
-                sig = numba.typing.signature(
-                    types.none, typemap[lhs.name], typemap[inst.target.name]
-                )
-                lowerer.fndesc.calltypes[print_node] = sig
+            lhs = ir.Var(scope, mk_unique_var("str_const"), loc)
+            assign_lhs = ir.Assign(
+                value=ir.Const(value=strval, loc=loc), target=lhs, loc=loc
+            )
+            typemap[lhs.name] = strconsttyp
+            new_body.append(assign_lhs)
+
+            # Make print node
+            print_node = ir.Print(args=[lhs, inst.target], vararg=None, loc=loc)
+            new_body.append(print_node)
+            calltypes[print_node] = numba.typing.signature(
+                types.none, strconsttyp, target_typ
+            )
+        new_block = ir.Block(scope, loc)
+        new_block.body = new_body
         loop_body[label] = new_block
 
 
-def replace_var_with_array_in_block(vars, block, typemap, calltypes):
-    new_block = []
-    for inst in block.body:
-        if isinstance(inst, ir.Assign) and inst.target.name in vars:
-            const_node = ir.Const(0, inst.loc)
-            const_var = ir.Var(
-                inst.target.scope, mk_unique_var("$const_ind_0"), inst.loc
-            )
-            typemap[const_var.name] = types.uintp
-            const_assign = ir.Assign(const_node, const_var, inst.loc)
-            new_block.append(const_assign)
+def _replace_var_with_setitem(inst, sig, typemap, calltypes):
+    """Rewrite ``var = value`` into ``var[0] = value`` for a race variable."""
+    const_node = ir.Const(0, inst.loc)
+    const_var = ir.Var(
+        inst.target.scope, mk_unique_var("$const_ind_0"), inst.loc
+    )
+    typemap[const_var.name] = types.uintp
+    const_assign = ir.Assign(const_node, const_var, inst.loc)
 
-            setitem_node = ir.SetItem(
-                inst.target, const_var, inst.value, inst.loc
-            )
-            calltypes[setitem_node] = signature(
-                types.none,
-                types.npytypes.Array(typemap[inst.target.name], 1, "C"),
-                types.intp,
-                typemap[inst.target.name],
+    setitem_node = ir.SetItem(inst.target, const_var, inst.value, inst.loc)
+    calltypes[setitem_node] = sig
+    return const_assign, setitem_node
+
+
+def _walk_block(block, collect_setitems, replace_vars, typemap, calltypes):
+    # The new body is only allocated once the first replacement is made.
+    new_body = None
+    for i, inst in enumerate(block.body):
+        if (
+            replace_vars
+            and isinstance(inst, ir.Assign)
+            and inst.target.name in replace_vars
+        ):
+            if new_body is None:
+                new_body = block.body[:i]
+            sig = replace_vars[inst.target.name]
+            new_body.extend(
+                _replace_var_with_setitem(inst, sig, typemap, calltypes)
             )
-            new_block.append(setitem_node)
+            if collect_setitems is not None:
+                collect_setitems.add(inst.target.name)
             continue
+        elif isinstance(inst, (ir.StaticSetItem, ir.SetItem)):
+            if collect_setitems is not None:
+                collect_setitems.add(inst.target.name)
         elif isinstance(inst, parfor.Parfor):
-            replace_var_with_array_internal(
-                vars, {0: inst.init_block}, typemap, calltypes
+            _walk_block(
+                inst.init_block,
+                collect_setitems,
+                replace_vars,
+                typemap,
+                calltypes,
             )
-            replace_var_with_array_internal(
-                vars, inst.loop_body, typemap, calltypes
+            _walk_loop_body(
+                inst.loop_body,
+                collect_setitems=collect_setitems,
+                replace_vars=replace_vars,
+                typemap=typemap,
+                calltypes=calltypes,
             )
 
-        new_block.append(inst)
-    return new_block
+        if new_body is not None:
+            new_body.append(inst)
 
+    if new_body is not None:
+        block.body = new_body
 
-def replace_var_with_array_internal(vars, loop_body, typemap, calltypes):
-    for label, block in loop_body.items():
-        block.body = replace_var_with_array_in_block(
-            vars, block, typemap, calltypes
-        )
+
+def _walk_loop_body(
+    loop_body,
+    *,
+    collect_setitems=None,
+    replace_vars=None,
+    typemap=None,
+    calltypes=None,
+):
+    """Walk the blocks of a parfor loop body, and of any nested parfor, once.
+
+    The names of the arrays that are written into are added to
+    ``collect_setitems``. Assignments to the variables in ``replace_vars``
+    are rewritten into a store to the first element of a one element array.
+    ``replace_vars`` maps the name of each variable to the signature of the
+    setitem that replaces its assignments.
+    """
+    for block in loop_body.values():
+        _walk_block(block, collect_setitems, replace_vars, typemap, calltypes)
 
 
-def replace_var_with_array(vars, loop_body, typemap, calltypes):
-    replace_var_with_array_internal(vars, loop_body, typemap, calltypes)
+def replace_var_with_array(vars, loop_body, typemap, calltypes, setitems=None):
+    # The setitem signature only depends on the type of the variable, so it
+    # is built once per variable rather than once per assignment.
+    array_types = {}
+    setitem_sigs = {}
     for v in vars:
         el_typ = typemap[v]
-        typemap.pop(v, None)
-        typemap[v] = types.npytypes.Array(el_typ, 1, "C")
+        array_types[v] = types.npytypes.Array(el_typ, 1, "C")
+        setitem_sigs[v] = signature(
+            types.none, array_types[v], types.intp, el_typ
+        )
+    if not setitem_sigs and setitems is None:
+        return
+
+    _walk_loop_body(
+        loop_body,
+        collect_setitems=setitems,
+        replace_vars=setitem_sigs,
+        typemap=typemap,
+        calltypes=calltypes,
+    )
+    typemap.update(array_types)
 
 
-def wrap_loop_body(loop_body):
+def wrap_loop_body(loop_body, first_label=None, last_label=None):
     blocks = loop_body.copy()  # shallow copy is enough
-    first_label = min(blocks.keys())
-    last_label = max(blocks.keys())
+    if first_label is None:
+        first_label = min(blocks.keys())
+    if last_label is None:
+        last_label = max(blocks.keys())
     loc = blocks[last_label].loc
     blocks[last_label].body.append(ir.Jump(first_label, loc))
     return blocks
 
 
-def unwrap_loop_body(loop_body):
-    last_label = max(loop_body.keys())
+def unwrap_loop_body(loop_body, last_label=None):
+    if last_label is None:
+        last_label = max(loop_body.keys())
     loop_body[last_label].body = loop_body[last_label].body[:-1]
 
 
@@ -248,30 +498,237 @@ def to_scalar_from_0d(x):
     return x
 
 
-def find_setitems_block(setitems, block, typemap):
-    for inst in block.body:
-        if isinstance(inst, ir.StaticSetItem) or isinstance(inst, ir.SetItem):
-            setitems.add(inst.target.name)
-        elif isinstance(inst, parfor.Parfor):
-            find_setitems_block(setitems, inst.init_block, typemap)
-            find_setitems_body(setitems, inst.loop_body, typemap)
+def _create_gufunc_for_regular_parfor():
+    # TODO
+    pass
+
+
+def _create_gufunc_for_reduction_parfor():
+    raise ValueError("Reductions are not yet supported via parfor")
 
 
-def find_setitems_body(setitems, loop_body, typemap):
+# Kernels compiled for parfors keyed by a hash of the typed gufunc IR and of
+# the gufunc parameter types. Every entry keeps the SYCL context the kernel
+# was built for along with the kernel.
+_PARFOR_KERNEL_CACHE = {}
+
+# Object addresses in reprs, e.g. "<function f at 0x7f2c1e8b5d30>".
+_ADDRESS_RE = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def _iter_constant_values(blocks):
+    """Yield the values of the globals, free variables and constants used in
+    ``blocks`` and in the parfors nested in them.
     """
-    Find the arrays that are written into (goes into setitems)
+    for block in blocks.values():
+        for inst in block.body:
+            if isinstance(inst, ir.Assign) and isinstance(
+                inst.value, (ir.Global, ir.FreeVar, ir.Const)
+            ):
+                yield inst.value.value
+            elif isinstance(inst, parfor.Parfor):
+                yield from _iter_constant_values({None: inst.init_block})
+                yield from _iter_constant_values(inst.loop_body)
+
+
+def _iter_typed_nodes(blocks):
+    """Yield the statements and expressions of ``blocks`` and of the parfors
+    nested in them, in a deterministic order.
     """
-    for label, block in loop_body.items():
-        find_setitems_block(setitems, block, typemap)
+    for block in blocks.values():
+        for inst in block.body:
+            yield inst
+            if isinstance(inst, ir.Assign):
+                yield inst.value
+            elif isinstance(inst, parfor.Parfor):
+                yield from _iter_typed_nodes({None: inst.init_block})
+                yield from _iter_typed_nodes(inst.loop_body)
 
 
-def _create_gufunc_for_regular_parfor():
-    # TODO
-    pass
+def _code_digest(code):
+    """Return a digest of the bytecode of ``code`` and of its nested code
+    objects, which does not depend on where they live in memory.
+    """
+    h = hashlib.blake2b()
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            h.update(_code_digest(const).encode())
+        else:
+            h.update(repr(const).encode())
+    return h.hexdigest()
 
 
-def _create_gufunc_for_reduction_parfor():
-    raise ValueError("Reductions are not yet supported via parfor")
+def _constant_fingerprints(value):
+    """Return exact descriptions of the arrays and functions in ``value``.
+
+    NumPy elides the middle of large arrays when printing them, and
+    functions and dispatchers print their address, so the IR dump alone
+    neither tells apart two bodies capturing different arrays nor matches
+    two bodies calling the same function.
+    """
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(value.tobytes()).hexdigest()
+        return ["%r %r %s" % (value.dtype, value.shape, digest)]
+    if isinstance(value, tuple):
+        return [fp for item in value for fp in _constant_fingerprints(item)]
+
+    # Dispatchers and DPPY functions keep the Python function they compile.
+    py_func = getattr(value, "py_func", value)
+    if isinstance(py_func, FunctionType):
+        fingerprints = [
+            "%s %s" % (py_func.__qualname__, _code_digest(py_func.__code__))
+        ]
+        for cell in py_func.__closure__ or ():
+            try:
+                contents = cell.cell_contents
+            except ValueError:
+                continue
+            fingerprints.extend(
+                _constant_fingerprints(contents)
+                or [_ADDRESS_RE.sub("", repr(contents))]
+            )
+        return fingerprints
+    return []
+
+
+def _serialize_blocks(blocks, typemap, calltypes):
+    """Return a textual form of IR blocks that does not depend on the unique
+    names given to the variables, so that identical parfor bodies lowered
+    at different times serialize to the same text.
+
+    The types of the variables and the signatures of the calls are part of
+    it, since a constant such as ``np.float32(0.1)`` dumps like ``0.1``.
+    """
+    buf = io.StringIO()
+    for label, block in blocks.items():
+        print("label %s:" % label, file=buf)
+        block.dump(file=buf)
+
+    var_names = get_name_var_table(blocks)
+    canonical_names = {name: "$v%d" % i for i, name in enumerate(var_names)}
+    text = re.sub(
+        r"[\w$.]+",
+        lambda m: canonical_names.get(m.group(0), m.group(0)),
+        buf.getvalue(),
+    )
+
+    var_types = [
+        "%s: %s" % (canonical_names[name], typemap[name])
+        for name in var_names
+        if name in typemap
+    ]
+    call_signatures = [
+        str(calltypes[node])
+        for node in _iter_typed_nodes(blocks)
+        if node in calltypes
+    ]
+    constant_fingerprints = [
+        fp
+        for value in _iter_constant_values(blocks)
+        for fp in _constant_fingerprints(value)
+    ]
+    text = "\n".join(
+        [text] + var_types + call_signatures + constant_fingerprints
+    )
+    return _ADDRESS_RE.sub("", text)
+
+
+def _parfor_kernel_cache_key(
+    gufunc_ir,
+    typemap,
+    calltypes,
+    gufunc_param_types,
+    param_types_addrspaces,
+    debug,
+):
+    key = "\n".join(
+        [
+            dppy.__version__,
+            _serialize_blocks(gufunc_ir.blocks, typemap, calltypes),
+            repr(gufunc_param_types),
+            repr(param_types_addrspaces),
+            repr(debug),
+        ]
+    )
+    return hashlib.blake2b(key.encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _toolchain_versions():
+    """Versions of the tools the SPIR-V stored on disk depends on."""
+    return "\n".join(
+        [
+            numba.__version__,
+            dpctl.__version__,
+            CmdLine.llvm_spirv_version(),
+            repr(config.NATIVE_FP_ATOMICS),
+        ]
+    )
+
+
+def _parfor_kernel_cache_path(ir_hash):
+    # Unlike _PARFOR_KERNEL_CACHE the files outlive the process, so their
+    # names also depend on the versions of the toolchain.
+    key = ir_hash + "\n" + _toolchain_versions()
+    file_name = hashlib.blake2b(key.encode()).hexdigest() + ".spv.pkl"
+    return os.path.join(config.CACHE_DIR, file_name)
+
+
+def _load_parfor_kernel(ir_hash, sycl_queue, argtypes):
+    """Restore a kernel from the SPIR-V stored on disk for ``ir_hash``."""
+    try:
+        with open(_parfor_kernel_cache_path(ir_hash), "rb") as f:
+            entry_name, spirv_bc = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    from numba_dppy.descriptor import dppy_target
+
+    return dppy.compiler.DPPYKernel(
+        context=dppy_target.target_context,
+        sycl_queue=sycl_queue,
+        llvm_module=None,
+        name=entry_name,
+        argtypes=argtypes,
+        spirv_bc=spirv_bc,
+    )
+
+
+def _save_parfor_kernel(ir_hash, kernel):
+    """Store the SPIR-V of ``kernel`` on disk, failures are not fatal."""
+    try:
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=config.CACHE_DIR)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((kernel.entry_name, kernel.spirv_bc), f)
+        os.replace(tmp_path, _parfor_kernel_cache_path(ir_hash))
+    except OSError as e:
+        if config.DEBUG:
+            print("Failed to save parfor kernel to cache:", e)
+
+
+def _get_cached_parfor_kernel(ir_hash, sycl_queue, argtypes):
+    result = _PARFOR_KERNEL_CACHE.get(ir_hash)
+    if result:
+        sycl_ctx, kernel = result
+        if sycl_ctx == sycl_queue.sycl_context:
+            return kernel
+
+    if config.CACHE_PARFOR_KERNELS_ON_DISK:
+        kernel = _load_parfor_kernel(ir_hash, sycl_queue, argtypes)
+        if kernel is not None:
+            _PARFOR_KERNEL_CACHE[ir_hash] = (sycl_queue.sycl_context, kernel)
+            return kernel
+
+    return None
+
+
+def _cache_parfor_kernel(ir_hash, sycl_queue, kernel):
+    _PARFOR_KERNEL_CACHE[ir_hash] = (sycl_queue.sycl_context, kernel)
+    if config.CACHE_PARFOR_KERNELS_ON_DISK:
+        _save_parfor_kernel(ir_hash, kernel)
 
 
 def _create_gufunc_for_parfor_body(
@@ -296,13 +753,12 @@ def _create_gufunc_for_parfor_body(
         2) The parfor body that does the work for a single point in
            the iteration space.
 
-    Part 1 is created as Python text for simplicity with a sentinel
-    assignment to mark the point in the IR where the parfor body
-    should be added. This Python text is 'exec'ed into existence and its
-    IR retrieved with run_frontend. The IR is scanned for the sentinel
-    assignment where that basic block is split and the IR for the parfor
-    body inserted.
+    Part 1 is built directly as Numba IR by ``_build_gufunc_ir``. Its entry
+    block computes the loop indices and jumps into the blocks of the parfor
+    body, which in turn jump to the loop latches or the return block of the
+    outline.
     """
+    debug_array_opt = config.DEBUG_ARRAY_OPT
 
     loc = parfor.init_block.loc
 
@@ -310,21 +766,27 @@ def _create_gufunc_for_parfor_body(
     # We have to do some replacements of Var names in the parfor body
     # to make them legal parameter names. If we don't copy then the
     # Vars in the main function also would incorrectly change their name.
-
-    loop_body = copy.copy(parfor.loop_body)
-    remove_dels(loop_body)
+    # New blocks are created so that rewriting their bodies does not change
+    # the blocks of the parfor, the ir.Del nodes are dropped on the way.
+    loop_body = {}
+    for label, block in parfor.loop_body.items():
+        new_block = ir.Block(block.scope, block.loc)
+        new_block.body = [
+            inst for inst in block.body if not isinstance(inst, ir.Del)
+        ]
+        loop_body[label] = new_block
 
     parfor_dim = len(parfor.loop_nests)
     loop_indices = [l.index_variable.name for l in parfor.loop_nests]
 
     # Get all the parfor params.
     parfor_params = parfor.params
-
-    for start, stop, step in loop_ranges:
-        if isinstance(start, ir.Var):
-            parfor_params.add(start.name)
-        if isinstance(stop, ir.Var):
-            parfor_params.add(stop.name)
+    parfor_params.update(
+        bound.name
+        for start, stop, step in loop_ranges
+        for bound in (start, stop)
+        if isinstance(bound, ir.Var)
+    )
 
     # Get just the outputs of the parfor.
     parfor_outputs = numba.parfors.parfor.get_parfor_outputs(
@@ -342,8 +804,10 @@ def _create_gufunc_for_parfor_body(
     if has_reduction:
         _create_gufunc_for_reduction_parfor()
 
-    # Compute just the parfor inputs as a set difference.
-    parfor_inputs = sorted(list(set(parfor_params) - set(parfor_outputs)))
+    # Compute just the parfor inputs as a set difference. parfor.params is
+    # a set, so the inputs are sorted to get a deterministic argument order.
+    outputs_set = frozenset(parfor_outputs)
+    parfor_inputs = sorted(p for p in parfor_params if p not in outputs_set)
 
     for race in races:
         msg = (
@@ -352,9 +816,13 @@ def _create_gufunc_for_parfor_body(
             "in non-deterministic or unintended results." % race
         )
         warnings.warn(NumbaParallelSafetyWarning(msg, loc))
-    replace_var_with_array(races, loop_body, typemap, lowerer.fndesc.calltypes)
+    # Find the arrays that are written into while rewriting the race variables.
+    setitems = set()
+    replace_var_with_array(
+        races, loop_body, typemap, lowerer.fndesc.calltypes, setitems
+    )
 
-    if config.DEBUG_ARRAY_OPT >= 1:
+    if debug_array_opt >= 1:
         print("parfor_params = ", parfor_params, type(parfor_params))
         print("parfor_outputs = ", parfor_outputs, type(parfor_outputs))
         print("parfor_inputs = ", parfor_inputs, type(parfor_inputs))
@@ -362,18 +830,7 @@ def _create_gufunc_for_parfor_body(
     # Reorder all the params so that inputs go first then outputs.
     parfor_params = parfor_inputs + parfor_outputs
 
-    def addrspace_from(params, def_addr):
-        addrspaces = []
-        for p in params:
-            if isinstance(to_scalar_from_0d(typemap[p]), types.npytypes.Array):
-                addrspaces.append(def_addr)
-            else:
-                addrspaces.append(None)
-        return addrspaces
-
-    addrspaces = addrspace_from(parfor_params, address_space.GLOBAL)
-
-    if config.DEBUG_ARRAY_OPT >= 1:
+    if debug_array_opt >= 1:
         print("parfor_params = ", parfor_params, type(parfor_params))
         print("loop_indices = ", loop_indices, type(loop_indices))
         print("loop_body = ", loop_body, type(loop_body))
@@ -382,7 +839,7 @@ def _create_gufunc_for_parfor_body(
     # Some Var are not legal parameter names so create a dict of
     # potentially illegal param name to guaranteed legal name.
     param_dict = legalize_names_with_typemap(parfor_params, typemap)
-    if config.DEBUG_ARRAY_OPT >= 1:
+    if debug_array_opt >= 1:
         print("param_dict = ", sorted(param_dict.items()), type(param_dict))
 
     # Some loop_indices are not legal parameter names so create a dict
@@ -391,7 +848,7 @@ def _create_gufunc_for_parfor_body(
     # Compute a new list of legal loop index names.
     legal_loop_indices = [ind_dict[v] for v in loop_indices]
 
-    if config.DEBUG_ARRAY_OPT >= 1:
+    if debug_array_opt >= 1:
         print("ind_dict = ", sorted(ind_dict.items()), type(ind_dict))
         print(
             "legal_loop_indices = ",
@@ -403,22 +860,23 @@ def _create_gufunc_for_parfor_body(
             print("pd = ", pd)
             print("pd type = ", typemap[pd], type(typemap[pd]))
 
-    # Get the types of each parameter.
-    param_types = [to_scalar_from_0d(typemap[v]) for v in parfor_params]
-
-    param_types_addrspaces = copy.copy(param_types)
-
-    # Calculate types of args passed to gufunc.
-    func_arg_types = [typemap[v] for v in (parfor_inputs + parfor_outputs)]
-    assert len(param_types_addrspaces) == len(addrspaces)
-    for i in range(len(param_types_addrspaces)):
-        if addrspaces[i] is not None:
+    # Get the types of each parameter, and of the args passed to gufunc.
+    param_types = []
+    param_types_addrspaces = []
+    func_arg_types = []
+    for v in parfor_params:
+        typ = typemap[v]
+        func_arg_types.append(typ)
+        param_typ = to_scalar_from_0d(typ)
+        param_types.append(param_typ)
+        if isinstance(param_typ, types.npytypes.Array):
             # Convert Numba's npytype.Array to DPPYArray data type. DPPYArray
             # allows us to specify an address space for the data and other
             # pointer arguments for the array.
-            param_types_addrspaces[i] = npytypes_array_to_dppy_array(
-                param_types_addrspaces[i], addrspaces[i]
+            param_typ = npytypes_array_to_dppy_array(
+                param_typ, address_space.GLOBAL
             )
+        param_types_addrspaces.append(param_typ)
 
     def print_arg_with_addrspaces(args):
         for a in args:
@@ -426,7 +884,7 @@ def _create_gufunc_for_parfor_body(
             if isinstance(a, types.npytypes.Array):
                 print("addrspace:", a.addrspace)
 
-    if config.DEBUG_ARRAY_OPT >= 1:
+    if debug_array_opt >= 1:
         print_arg_with_addrspaces(param_types)
         print("func_arg_types = ", func_arg_types, type(func_arg_types))
 
@@ -452,78 +910,20 @@ def _create_gufunc_for_parfor_body(
 
     # Change parfor body to replace illegal loop index vars with legal ones.
     replace_var_names(loop_body, ind_dict)
-    loop_body_var_table = get_name_var_table(loop_body)
-    sentinel_name = get_unused_var_name("__sentinel__", loop_body_var_table)
 
-    if config.DEBUG_ARRAY_OPT >= 1:
+    if debug_array_opt >= 1:
         print("legal parfor_params = ", parfor_params, type(parfor_params))
 
     # Determine the unique names of the scheduling and gufunc functions.
     gufunc_name = "__numba_parfor_gufunc_%s" % (parfor.id)
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         # print("sched_func_name ", type(sched_func_name), sched_func_name)
         print("gufunc_name ", type(gufunc_name), gufunc_name)
 
-    gufunc_txt = ""
-
-    # Create the gufunc function.
-    gufunc_txt += "def " + gufunc_name
-    gufunc_txt += "(" + (", ".join(parfor_params)) + "):\n"
-
-    gufunc_txt += _schedule_loop(
-        parfor_dim, legal_loop_indices, loop_ranges, param_dict
-    )
-
-    # Add the sentinel assignment so that we can find the loop body position
-    # in the IR.
-    gufunc_txt += "    "
-    gufunc_txt += sentinel_name + " = 0\n"
-
-    # gufunc returns nothing
-    gufunc_txt += "    return None\n"
-
-    if config.DEBUG_ARRAY_OPT:
-        print("gufunc_txt = ", type(gufunc_txt), "\n", gufunc_txt)
-        sys.stdout.flush()
-    # Force gufunc outline into existence.
-    globls = {"np": np, "numba": numba, "dppy": dppy}
-    locls = {}
-    exec(gufunc_txt, globls, locls)
-    gufunc_func = locls[gufunc_name]
-
-    if config.DEBUG_ARRAY_OPT:
-        print("gufunc_func = ", type(gufunc_func), "\n", gufunc_func)
-    # Get the IR for the gufunc outline.
-    gufunc_ir = compiler.run_frontend(gufunc_func)
-
-    if config.DEBUG_ARRAY_OPT:
-        print("gufunc_ir dump ", type(gufunc_ir))
-        gufunc_ir.dump()
-        print("loop_body dump ", type(loop_body))
-        _print_body(loop_body)
-
-    # rename all variables in gufunc_ir afresh
-    var_table = get_name_var_table(gufunc_ir.blocks)
-    new_var_dict = {}
-    reserved_names = (
-        [sentinel_name] + list(param_dict.values()) + legal_loop_indices
-    )
-    for name, var in var_table.items():
-        if not (name in reserved_names):
-            new_var_dict[name] = mk_unique_var(name)
-    replace_var_names(gufunc_ir.blocks, new_var_dict)
-    if config.DEBUG_ARRAY_OPT:
-        print("gufunc_ir dump after renaming ")
-        gufunc_ir.dump()
-
-    prs_dict = {}
-    pss_dict = {}
-    pspmd_dict = {}
-
     gufunc_param_types = param_types
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         print(
             "gufunc_param_types = ",
             type(gufunc_param_types),
@@ -531,102 +931,81 @@ def _create_gufunc_for_parfor_body(
             gufunc_param_types,
         )
 
-    gufunc_stub_last_label = max(gufunc_ir.blocks.keys()) + 1
-
-    # Add gufunc stub last label to each parfor.loop_body label to prevent
-    # label conflicts.
-    loop_body = add_offset_to_labels(loop_body, gufunc_stub_last_label)
-    # new label for splitting sentinel block
-    new_label = max(loop_body.keys()) + 1
+    body_first_label = min(loop_body.keys())
+    body_last_label = max(loop_body.keys())
 
     # If enabled, add a print statement after every assignment.
     if config.DEBUG_ARRAY_OPT_RUNTIME:
         _dbgprint_after_each_array_assignments(lowerer, loop_body, typemap)
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         print("parfor loop body")
         _print_body(loop_body)
 
-    wrapped_blocks = wrap_loop_body(loop_body)
+    wrapped_blocks = wrap_loop_body(
+        loop_body, body_first_label, body_last_label
+    )
     # hoisted, not_hoisted = hoist(parfor_params, loop_body,
     #                             typemap, wrapped_blocks)
-    setitems = set()
-    find_setitems_body(setitems, loop_body, typemap)
+    # The kernel arguments are passed under their legalized names.
+    setitems = {param_dict.get(name, name) for name in setitems}
 
     hoisted = []
     not_hoisted = []
 
-    start_block = gufunc_ir.blocks[min(gufunc_ir.blocks.keys())]
-    start_block.body = start_block.body[:-1] + hoisted + [start_block.body[-1]]
-    unwrap_loop_body(loop_body)
+    unwrap_loop_body(loop_body, body_last_label)
 
     # store hoisted into diagnostics
     diagnostics = lowerer.metadata["parfor_diagnostics"]
-    diagnostics.hoist_info[parfor.id] = {
-        "hoisted": hoisted,
-        "not_hoisted": not_hoisted,
-    }
+    if hoisted or not_hoisted:
+        diagnostics.hoist_info[parfor.id] = {
+            "hoisted": hoisted,
+            "not_hoisted": not_hoisted,
+        }
+    else:
+        diagnostics.hoist_info[parfor.id] = _EMPTY_HOIST_INFO
 
-    lowerer.metadata["parfor_diagnostics"].extra_info[str(parfor.id)] = str(
-        dpctl.get_current_queue().get_sycl_device().name
+    # The queue is looked up once and reused to compile the kernel.
+    sycl_queue = dpctl.get_current_queue()
+    diagnostics.extra_info[str(parfor.id)] = str(
+        sycl_queue.get_sycl_device().name
     )
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         print("After hoisting")
         _print_body(loop_body)
 
-    # Search all the block in the gufunc outline for the sentinel assignment.
-    for label, block in gufunc_ir.blocks.items():
-        for i, inst in enumerate(block.body):
-            if (
-                isinstance(inst, ir.Assign)
-                and inst.target.name == sentinel_name
-            ):
-                # We found the sentinel assignment.
-                loc = inst.loc
-                scope = block.scope
-                # split block across __sentinel__
-                # A new block is allocated for the statements prior to the
-                # sentinel but the new block maintains the current block label.
-                prev_block = ir.Block(scope, loc)
-                prev_block.body = block.body[:i]
-
-                # The current block is used for statements after the sentinel.
-                block.body = block.body[i + 1 :]
-                # But the current block gets a new label.
-                body_first_label = min(loop_body.keys())
-
-                # The previous block jumps to the minimum labelled block of the
-                # parfor body.
-                prev_block.append(ir.Jump(body_first_label, loc))
-                # Add all the parfor loop body blocks to the gufunc function's
-                # IR.
-                for (l, b) in loop_body.items():
-                    gufunc_ir.blocks[l] = b
-                body_last_label = max(loop_body.keys())
-                gufunc_ir.blocks[new_label] = block
-                gufunc_ir.blocks[label] = prev_block
-                # Add a jump from the last parfor body block to the block
-                # containing statements after the sentinel.
-                gufunc_ir.blocks[body_last_label].append(
-                    ir.Jump(new_label, loc)
-                )
-                break
-        else:
-            continue
-        break
+    # Build the IR of the gufunc outline directly around the parfor body.
+    gufunc_blocks = _build_gufunc_ir(
+        parfor_dim,
+        legal_loop_indices,
+        loop_ranges,
+        param_dict,
+        parfor_params,
+        loop_body,
+        (body_first_label, body_last_label),
+        loc,
+    )
 
-    if config.DEBUG_ARRAY_OPT:
-        print("gufunc_ir last dump before renaming")
-        gufunc_ir.dump()
+    start_block = gufunc_blocks[min(gufunc_blocks)]
+    start_block.body = start_block.body[:-1] + hoisted + [start_block.body[-1]]
 
-    gufunc_ir.blocks = rename_labels(gufunc_ir.blocks)
-    remove_dels(gufunc_ir.blocks)
+    gufunc_ir = ir.FunctionIR(
+        blocks=gufunc_blocks,
+        is_generator=False,
+        func_id=FunctionIdentity.from_function(
+            _make_gufunc_stub(gufunc_name, parfor_params, parfor.loc)
+        ),
+        loc=loc,
+        definitions=build_definitions(gufunc_blocks),
+        arg_count=len(parfor_params),
+        arg_names=tuple(parfor_params),
+    )
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         sys.stdout.flush()
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         print("gufunc_ir last dump")
         gufunc_ir.dump()
         print("flags", flags)
@@ -634,49 +1013,67 @@ def _create_gufunc_for_parfor_body(
 
     old_alias = flags.noalias
     if not has_aliases:
-        if config.DEBUG_ARRAY_OPT:
+        if debug_array_opt:
             print("No aliases found so adding noalias flag.")
         flags.noalias = True
 
     remove_dead(gufunc_ir.blocks, gufunc_ir.arg_names, gufunc_ir, typemap)
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         print("gufunc_ir after remove dead")
         gufunc_ir.dump()
 
     kernel_sig = signature(types.none, *gufunc_param_types)
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         sys.stdout.flush()
 
-    if config.DEBUG_ARRAY_OPT:
-        print("before DUFunc inlining".center(80, "-"))
-        gufunc_ir.dump()
-
-    # Inlining all DUFuncs
-    dufunc_inliner(
+    # Reuse the kernel if an identical gufunc was already compiled.
+    ir_hash = _parfor_kernel_cache_key(
         gufunc_ir,
-        lowerer.fndesc.calltypes,
         typemap,
-        lowerer.context.typing_context,
-        lowerer.context,
-    )
-
-    if config.DEBUG_ARRAY_OPT:
-        print("after DUFunc inline".center(80, "-"))
-        gufunc_ir.dump()
-
-    kernel_func = dppy.compiler.compile_kernel_parfor(
-        dpctl.get_current_queue(),
-        gufunc_ir,
+        lowerer.fndesc.calltypes,
         gufunc_param_types,
         param_types_addrspaces,
-        debug=flags.debuginfo,
+        flags.debuginfo,
+    )
+    kernel_func = _get_cached_parfor_kernel(
+        ir_hash, sycl_queue, param_types_addrspaces
     )
 
+    if kernel_func is None:
+        # Inlining all DUFuncs, most parfor bodies do not call any.
+        if has_dufunc_callsite(gufunc_ir):
+            if debug_array_opt:
+                print("before DUFunc inlining".center(80, "-"))
+                gufunc_ir.dump()
+
+            dufunc_inliner(
+                gufunc_ir,
+                lowerer.fndesc.calltypes,
+                typemap,
+                lowerer.context.typing_context,
+                lowerer.context,
+            )
+
+            if debug_array_opt:
+                print("after DUFunc inline".center(80, "-"))
+                gufunc_ir.dump()
+
+        kernel_func = dppy.compiler.compile_kernel_parfor(
+            sycl_queue,
+            gufunc_ir,
+            gufunc_param_types,
+            param_types_addrspaces,
+            debug=flags.debuginfo,
+        )
+        _cache_parfor_kernel(ir_hash, sycl_queue, kernel_func)
+    elif debug_array_opt:
+        print("Reusing cached kernel for", gufunc_name)
+
     flags.noalias = old_alias
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         print("kernel_sig = ", kernel_sig)
 
     return kernel_func, parfor_args, kernel_sig, func_arg_types, setitems
@@ -839,36 +1236,36 @@ def _create_shape_signature(
     typemap,
 ):
     """Create shape signature for GUFunc"""
-    if config.DEBUG_ARRAY_OPT:
+    debug_array_opt = config.DEBUG_ARRAY_OPT
+    if debug_array_opt:
         print("_create_shape_signature", num_inputs, args)
-        arg_start_print = 0
-        for i in args[arg_start_print:]:
-            print("argument", i, type(i), get_shape_classes(i, typemap=typemap))
 
     # num_inouts = len(args) - num_reductions
     num_inouts = len(args)
     # maximum class number for array shapes
-    classes = [
-        get_shape_classes(var, typemap=typemap) if var not in races else (-1,)
-        for var in args[1:]
-    ]
+    classes = []
     class_set = set()
-    for _class in classes:
+    for var in args[1:]:
+        _class = (
+            get_shape_classes(var, typemap=typemap)
+            if var not in races
+            else (-1,)
+        )
+        if debug_array_opt:
+            print("argument", var, type(var), _class)
+        classes.append(_class)
         if _class:
-            for i in _class:
-                class_set.add(i)
+            class_set.update(_class)
     max_class = max(class_set) + 1 if class_set else 0
     classes.insert(0, (max_class,))  # force set the class of 'sched' argument
     class_set.add(max_class)
-    class_map = {}
     # TODO: use prefix + class number instead of single char
-    alphabet = ord("a")
-    for n in class_set:
-        if n >= 0:
-            class_map[n] = chr(alphabet)
-            alphabet += 1
+    class_map = {
+        n: chr(ord("a") + i)
+        for i, n in enumerate(sorted(n for n in class_set if n >= 0))
+    }
 
-    alpha_dict = {"latest_alpha": alphabet}
+    alpha_dict = {"latest_alpha": ord("a") + len(class_map)}
 
     def bump_alpha(c, class_map):
         if c >= 0:
@@ -879,21 +1276,17 @@ def _create_shape_signature(
 
     gu_sin = []
     gu_sout = []
-    count = 0
-    syms_sin = ()
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         print("args", args)
         print("classes", classes)
 
-    for cls, arg in zip(classes, args):
-        count = count + 1
+    for cls in classes:
         if cls:
             dim_syms = tuple(bump_alpha(c, class_map) for c in cls)
         else:
             dim_syms = ()
         gu_sin.append(dim_syms)
-        syms_sin += dim_syms
     return (gu_sin, gu_sout)
 
 
@@ -919,8 +1312,9 @@ def generate_kernel_launch_ops(
     builder = lowerer.builder
     sin, sout = gu_signature
     num_dim = len(loop_ranges)
+    debug_array_opt = config.DEBUG_ARRAY_OPT
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         print("generate_kernel_launch_ops")
         print("args = ", expr_args)
         print(
@@ -945,63 +1339,38 @@ def generate_kernel_launch_ops(
     # Get a pointer to the current queue
     curr_queue = kernel_launcher.get_current_queue()
 
-    # Compute number of args
-    num_expanded_args = 0
-
-    for arg_type in expr_arg_types:
-        if isinstance(arg_type, types.npytypes.Array):
-            num_expanded_args += 5 + (2 * arg_type.ndim)
-        else:
-            num_expanded_args += 1
+    # Compute number of args, an array is expanded into 5 + 2 * ndim args.
+    num_expanded_args = sum(
+        5 + (2 * arg_type.ndim)
+        if isinstance(arg_type, types.npytypes.Array)
+        else 1
+        for arg_type in expr_arg_types
+    )
 
-    if config.DEBUG_ARRAY_OPT:
+    if debug_array_opt:
         print("num_expanded_args = ", num_expanded_args)
 
     # now that we know the total number of kernel args, lets allocate
     # a kernel_arg array
     kernel_launcher.allocate_kernel_arg_array(num_expanded_args)
 
-    ninouts = len(expr_args)
-
-    def getvar_or_none(lowerer, x):
-        try:
-            return lowerer.getvar(x)
-        except:
-            return None
-
-    def loadvar_or_none(lowerer, x):
-        try:
-            return lowerer.loadvar(x)
-        except:
-            return None
-
-    def val_type_or_none(context, lowerer, x):
-        try:
-            return context.get_value_type(lowerer.fndesc.typemap[x])
-        except:
-            return None
-
-    all_llvm_args = [getvar_or_none(lowerer, x) for x in expr_args[:ninouts]]
-    all_val_types = [
-        val_type_or_none(context, lowerer, x) for x in expr_args[:ninouts]
-    ]
-    all_args = [loadvar_or_none(lowerer, x) for x in expr_args[:ninouts]]
-
     keep_alive_kernels.append(cres)
 
+    varmap = lowerer.varmap
+    typemap = lowerer.fndesc.typemap
+
     # Call clSetKernelArg for each arg and create arg array for
     # the enqueue function. Put each part of each argument into
     # kernel_arg_array.
-    for var, llvm_arg, arg_type, gu_sig, val_type, index in zip(
-        expr_args,
-        all_llvm_args,
-        expr_arg_types,
-        sin + sout,
-        all_val_types,
-        range(len(expr_args)),
+    for index, (var, arg_type, gu_sig) in enumerate(
+        zip(expr_args, expr_arg_types, sin + sout)
     ):
+        # Variables that are not lowered get None.
+        llvm_arg = lowerer.getvar(var) if var in varmap else None
 
-        if config.DEBUG_ARRAY_OPT:
+        if debug_array_opt:
+            typ = typemap.get(var)
+            val_type = context.get_value_type(typ) if typ is not None else None
             print(
                 "var:",
                 var,
@@ -1031,14 +1400,11 @@ def generate_kernel_launch_ops(
         else:
             return context.get_constant(types.uintp, v)
 
-    num_dim = len(loop_ranges)
+    one = context.get_constant(types.uintp, 1)
     for i in range(num_dim):
         start, stop, step = loop_ranges[i]
-        start = load_range(start)
-        stop = load_range(stop)
         assert step == 1  # We do not support loop steps other than 1
-        step = load_range(step)
-        loop_ranges[i] = (start, stop, step)
+        loop_ranges[i] = (load_range(start), load_range(stop), one)
 
     kernel_launcher.enqueue_kernel_and_copy_back(loop_ranges, curr_queue)
 
@@ -1054,207 +1420,263 @@ class CopyIRException(RuntimeError):
         super().__init__(*args, **kwargs)
 
 
-def relatively_deep_copy(obj, memo):
-    # WARNING: there are some issues with genarators which were not investigated
-    # and root cause is not found. Though copied IR seems to work fine there are
-    # some extra references kept on generator objects which may result in a
-    # memory leak.
-
-    obj_id = id(obj)
-    if obj_id in memo:
-        return memo[obj_id]
-
-    from ctypes import _CFuncPtr
-    from types import ModuleType
+# The copy handlers below are generators. A handler yields every object it
+# needs a copy of and is sent that copy back, it returns the copy of the
+# object it was given. ``relatively_deep_copy`` drives them with an explicit
+# stack, so deeply nested IR does not hit the recursion limit.
+
+
+def _copy_fndesc(obj, memo):
+    cpy = funcdesc.FunctionDescriptor(
+        native=obj.native,
+        modname=obj.modname,
+        qualname=obj.qualname,
+        unique_name=obj.unique_name,
+        doc=obj.doc,
+        typemap=(yield obj.typemap),
+        restype=obj.restype,
+        calltypes=(yield obj.calltypes),
+        args=obj.args,
+        kws=obj.kws,
+        mangler=None,
+        argtypes=(yield obj.argtypes),
+        inline=obj.inline,
+        noalias=obj.noalias,
+        env_name=obj.env_name,
+        global_dict=obj.global_dict,
+    )
+    # mangler parameter is not saved in FunctionDescriptor, but used to generated name.
+    # So pass None as mangler parameter and then copy mangled_name by hands
+    cpy.mangled_name = obj.mangled_name
 
-    from numba.core.bytecode import FunctionIdentity
-    from numba.core.compiler import CompileResult
-    from numba.core.dispatcher import _DispatcherBase
-    from numba.core.types.abstract import Type
-    from numba.core.types.functions import Dispatcher, Function
-    from numba.core.typing.templates import Signature
-    from numba.np.ufunc.dufunc import DUFunc
+    memo[id(obj)] = cpy
+    return cpy
 
-    from numba_dppy.compiler import DPPYFunctionTemplate
 
-    # objects which shouldn't or can't be copied and it's ok not to copy it.
-    if isinstance(
-        obj,
-        (
-            FunctionIdentity,
-            _DispatcherBase,
-            Function,
-            Type,
-            Dispatcher,
-            ModuleType,
-            Signature,
-            DPPYFunctionTemplate,
-            CompileResult,
-            DUFunc,
-            _CFuncPtr,
-            type,
-            str,
-            bool,
-            type(None),
-        ),
-    ):
-        return obj
-
-    from numba.core.funcdesc import FunctionDescriptor
-    from numba.core.ir import FreeVar, FunctionIR, Global
-    from numba.core.postproc import PostProcessor
-
-    if isinstance(obj, FunctionDescriptor):
-        cpy = FunctionDescriptor(
-            native=obj.native,
-            modname=obj.modname,
-            qualname=obj.qualname,
-            unique_name=obj.unique_name,
-            doc=obj.doc,
-            typemap=relatively_deep_copy(obj.typemap, memo),
-            restype=obj.restype,
-            calltypes=relatively_deep_copy(obj.calltypes, memo),
-            args=obj.args,
-            kws=obj.kws,
-            mangler=None,
-            argtypes=relatively_deep_copy(obj.argtypes, memo),
-            inline=obj.inline,
-            noalias=obj.noalias,
-            env_name=obj.env_name,
-            global_dict=obj.global_dict,
-        )
-        # mangler parameter is not saved in FunctionDescriptor, but used to generated name.
-        # So pass None as mangler parameter and then copy mangled_name by hands
-        cpy.mangled_name = obj.mangled_name
-
-        memo[obj_id] = cpy
-
-        return cpy
-
-    if isinstance(obj, FunctionIR):
-        # PostProcessor do the following:
-        # 1. canonicolize cfg, modifying IR
-        # 2. fills internal generators status
-        # 3. creates and fills VariableLifetime object
-        # We can't copy this objects. So in order to have copy of it we need run PostProcessor on copied IR.
-        # This means, that in case PostProcess wasn't run for original object copied object would defer.
-        # In order to avoid this we are running PostProcess on original object firstly.
-        # This means that copy of IR actually has a side effect on it.
+def _copy_func_ir(obj, memo):
+    # PostProcessor do the following:
+    # 1. canonicolize cfg, modifying IR
+    # 2. fills internal generators status
+    # 3. creates and fills VariableLifetime object
+    # We can't copy this objects. So in order to have copy of it we need run PostProcessor on copied IR.
+    # This means, that in case PostProcess wasn't run for original object copied object would defer.
+    # In order to avoid this we are running PostProcess on original object firstly.
+    # This means that copy of IR actually has a side effect on it.
+    # IRLegalization already post-processes the IR right before lowering, so
+    # this is only needed for IR that has no variable lifetime yet.
+    if getattr(obj, "variable_lifetime", None) is None:
         pp = PostProcessor(obj)
         pp.run()
-        cpy = FunctionIR(
-            blocks=relatively_deep_copy(obj.blocks, memo),
-            is_generator=relatively_deep_copy(obj.is_generator, memo),
-            func_id=relatively_deep_copy(obj.func_id, memo),
-            loc=obj.loc,
-            definitions=relatively_deep_copy(obj._definitions, memo),
-            arg_count=obj.arg_count,
-            arg_names=relatively_deep_copy(obj.arg_names, memo),
-        )
-        pp = PostProcessor(cpy)
-        pp.run()
+    cpy = ir.FunctionIR(
+        blocks=(yield obj.blocks),
+        is_generator=(yield obj.is_generator),
+        func_id=(yield obj.func_id),
+        loc=obj.loc,
+        definitions=(yield obj._definitions),
+        arg_count=obj.arg_count,
+        arg_names=(yield obj.arg_names),
+    )
+    pp = PostProcessor(cpy)
+    pp.run()
 
-        memo[obj_id] = cpy
+    memo[id(obj)] = cpy
+    return cpy
 
-        return cpy
 
-    if isinstance(obj, Global):
-        cpy = Global(name=obj.name, value=obj.value, loc=obj.loc)
-        memo[obj_id] = cpy
+def _copy_global(obj, memo):
+    cpy = ir.Global(name=obj.name, value=obj.value, loc=obj.loc)
+    memo[id(obj)] = cpy
+    return cpy
+    yield  # makes this function a generator like the other handlers
 
-        return cpy
 
-    if isinstance(obj, FreeVar):
-        cpy = FreeVar(
-            index=obj.index, name=obj.name, value=obj.value, loc=obj.loc
-        )
-        memo[obj_id] = cpy
+def _copy_freevar(obj, memo):
+    cpy = ir.FreeVar(
+        index=obj.index, name=obj.name, value=obj.value, loc=obj.loc
+    )
+    memo[id(obj)] = cpy
+    return cpy
+    yield  # makes this function a generator like the other handlers
 
-        return cpy
 
-    # for containers we need to copy container itself first. And then fill it with copied items.
-    if isinstance(obj, list):
+# for containers we need to copy container itself first. And then fill it with copied items.
+# Subclasses are shallow copied and cleared to keep their type and attributes.
+def _copy_list(obj, memo):
+    if type(obj) is list:
+        cpy = []
+    else:
         cpy = copy.copy(obj)
         cpy.clear()
-        for item in obj:
-            cpy.append(relatively_deep_copy(item, memo))
-        memo[obj_id] = cpy
-        return cpy
-    elif isinstance(obj, dict):
+    memo[id(obj)] = cpy
+    for item in obj:
+        cpy.append((yield item))
+    return cpy
+
+
+def _copy_dict(obj, memo):
+    if type(obj) is dict:
+        cpy = {}
+    else:
         cpy = copy.copy(obj)
         cpy.clear()
-        for key, item in obj.items():
-            cpy[relatively_deep_copy(key, memo)] = relatively_deep_copy(
-                item, memo
-            )
-        memo[obj_id] = cpy
-        return cpy
-    elif isinstance(obj, tuple):
-        # subclass constructors could have different parameters than superclass.
-        # e.g. tuple and namedtuple constructors accepts quite different parameters.
-        # it is better to have separate section for namedtuple
-        tpl = tuple([relatively_deep_copy(item, memo) for item in obj])
-        if type(obj) == tuple:
-            cpy = tpl
-        else:
-            cpy = type(obj)(*tpl)
-        memo[obj_id] = cpy
-        return cpy
-    elif isinstance(obj, set):
+    memo[id(obj)] = cpy
+    for key, item in obj.items():
+        key_cpy = yield key
+        cpy[key_cpy] = yield item
+    return cpy
+
+
+def _copy_tuple(obj, memo):
+    # subclass constructors could have different parameters than superclass.
+    # e.g. tuple and namedtuple constructors accepts quite different parameters.
+    # it is better to have separate section for namedtuple
+    items = []
+    for item in obj:
+        items.append((yield item))
+    if type(obj) == tuple:
+        cpy = tuple(items)
+    else:
+        cpy = type(obj)(*items)
+    memo[id(obj)] = cpy
+    return cpy
+
+
+def _copy_set(obj, memo):
+    if type(obj) is set:
+        cpy = set()
+    else:
         cpy = copy.copy(obj)
         cpy.clear()
-        for item in obj:
-            cpy.add(relatively_deep_copy(item, memo))
-        memo[obj_id] = cpy
-        return cpy
+    memo[id(obj)] = cpy
+    for item in obj:
+        cpy.add((yield item))
+    return cpy
 
-    # some python objects are not copyable. In such case exception would be raised
-    # it is just a convinient point to find such objects
-    try:
-        cpy = copy.copy(obj)
-    except Exception as e:
-        raise e
-
-    # __slots__ for subclass specify only members declared in subclass. So to get all members we need to go through
-    # all supeclasses
-    def get_slots_members(obj):
-        keys = []
-        typ = obj
-        if not isinstance(typ, type):
-            typ = type(obj)
 
-        try:
-            if len(typ.__slots__):
-                keys.extend(typ.__slots__)
-            if len(typ.__bases__):
-                for base in typ.__bases__:
-                    keys.extend(get_slots_members(base))
-        except:
-            pass
+@functools.lru_cache(maxsize=None)
+def _get_slots_members(typ):
+    # __slots__ for subclass specify only members declared in subclass. So to
+    # get all members we need to go through all superclasses.
+    keys = []
+    for klass in typ.__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        keys.extend(slots)
+    return tuple(keys)
 
-        return keys
 
-    memo[obj_id] = cpy
-    keys = []
+def _copy_object(obj, memo):
+    # some python objects are not copyable. In such case exception would be
+    # raised by copy.copy().
+    cpy = copy.copy(obj)
+    memo[id(obj)] = cpy
 
     # Objects have either __dict__ or __slots__ or neither.
     # If object has none of it and it is copyable we already made a copy, just return it
-    # If object is not copyable we shouldn't reach this point.
-    try:
-        keys = obj.__dict__.keys()
-    except:
-        try:
-            obj.__slots__
-            keys = get_slots_members(obj)
-        except:
-            return cpy
+    obj_dict = getattr(obj, "__dict__", None)
+    if obj_dict is not None:
+        # The handler is suspended while the attributes are copied, so it
+        # iterates over a snapshot of them.
+        for key, attr in list(obj_dict.items()):
+            setattr(cpy, key, (yield attr))
+    else:
+        for key in _get_slots_members(type(obj)):
+            setattr(cpy, key, (yield getattr(obj, key)))
+    return cpy
 
-    for key in keys:
-        attr = getattr(obj, key)
-        attr_cpy = relatively_deep_copy(attr, memo)
-        setattr(cpy, key, attr_cpy)
 
-    return cpy
+# objects which shouldn't or can't be copied and it's ok not to copy it.
+# DPPYFunctionTemplate is added by _find_copy_handler, numba_dppy.compiler
+# can't be imported here because it imports this module.
+_NOCOPY_TYPES = (
+    FunctionIdentity,
+    _DispatcherBase,
+    Function,
+    Type,
+    Dispatcher,
+    ModuleType,
+    Signature,
+    CompileResult,
+    DUFunc,
+    _CFuncPtr,
+    type,
+    str,
+    bool,
+    type(None),
+    # immutable leaves of the IR, copying them only costs a copy.copy() call
+    int,
+    float,
+    complex,
+    ir.Loc,
+)
+
+_COPY_HANDLERS = (
+    (funcdesc.FunctionDescriptor, _copy_fndesc),
+    (ir.FunctionIR, _copy_func_ir),
+    (ir.Global, _copy_global),
+    (ir.FreeVar, _copy_freevar),
+    (list, _copy_list),
+    (dict, _copy_dict),
+    (tuple, _copy_tuple),
+    (set, _copy_set),
+)
+
+# Maps a type to its copy handler, None marks types which are not copied.
+# It is filled on the first copy of an object of each type.
+_copy_handlers = {}
+
+
+def _find_copy_handler(typ):
+    from numba_dppy.compiler import DPPYFunctionTemplate
+
+    if issubclass(typ, _NOCOPY_TYPES) or issubclass(
+        typ, DPPYFunctionTemplate
+    ):
+        return None
+
+    for base, handler in _COPY_HANDLERS:
+        if issubclass(typ, base):
+            return handler
+    return _copy_object
+
+
+def relatively_deep_copy(obj, memo):
+    # WARNING: there are some issues with genarators which were not investigated
+    # and root cause is not found. Though copied IR seems to work fine there are
+    # some extra references kept on generator objects which may result in a
+    # memory leak.
+
+    # Each entry of the stack is a handler waiting for the copy of the object
+    # it yielded last.
+    stack = []
+    while True:
+        obj_id = id(obj)
+        if obj_id in memo:
+            cpy = memo[obj_id]
+        else:
+            typ = type(obj)
+            try:
+                handler = _copy_handlers[typ]
+            except KeyError:
+                handler = _copy_handlers[typ] = _find_copy_handler(typ)
+
+            if handler is None:
+                cpy = obj
+            else:
+                stack.append(handler(obj, memo))
+                cpy = None
+
+        # Resume the handlers until one of them needs another object copied.
+        while stack:
+            try:
+                obj = stack[-1].send(cpy)
+                break
+            except StopIteration as e:
+                stack.pop()
+                cpy = e.value
+        else:
+            return cpy
 
 
 class WrapperDefaultLower(Lower):
@@ -1264,25 +1686,52 @@ class WrapperDefaultLower(Lower):
         return True
 
 
+@contextlib.contextmanager
+def _parfor_lowering(context, lower_fn):
+    """Lower the parfor nodes with ``lower_fn`` inside the ``with`` block.
+
+    Only Numba's CPUContext has the ``lower_extensions`` attribute, other
+    contexts are left unchanged.
+    """
+    lower_extensions = getattr(context, "lower_extensions", {})
+    if parfor.Parfor not in lower_extensions:
+        yield
+        return
+
+    lower_extension_parfor = lower_extensions[parfor.Parfor]
+    lower_extensions[parfor.Parfor] = lower_fn
+    try:
+        yield
+    finally:
+        lower_extensions[parfor.Parfor] = lower_extension_parfor
+
+
 class DPPYLower(Lower):
     def __init__(self, context, library, fndesc, func_ir, metadata=None):
         Lower.__init__(self, context, library, fndesc, func_ir, metadata)
-        memo = {}
 
-        fndesc_cpu = relatively_deep_copy(fndesc, memo)
-        func_ir_cpu = relatively_deep_copy(func_ir, memo)
+        # The GPU lowering modifies the IR, so the copy used to fall back to
+        # CPU has to be made up front. It is skipped when there is no fallback.
+        fallback_on_cpu = config.FALLBACK_ON_CPU == 1
+        if fallback_on_cpu:
+            memo = {}
+            fndesc_cpu = relatively_deep_copy(fndesc, memo)
+            func_ir_cpu = relatively_deep_copy(func_ir, memo)
 
-        cpu_context = (
-            context.cpu_context
-            if isinstance(context, DPPYTargetContext)
-            else context
-        )
         self.gpu_lower = self._lower(
             context, library, fndesc, func_ir, metadata
         )
-        self.cpu_lower = self._lower(
-            cpu_context, library, fndesc_cpu, func_ir_cpu, metadata
-        )
+        if fallback_on_cpu:
+            cpu_context = (
+                context.cpu_context
+                if isinstance(context, DPPYTargetContext)
+                else context
+            )
+            self.cpu_lower = self._lower(
+                cpu_context, library, fndesc_cpu, func_ir_cpu, metadata
+            )
+        else:
+            self.cpu_lower = None
 
     def _lower(self, context, library, fndesc, func_ir, metadata):
         """Create Lower with changed linkageName in debug info"""
@@ -1337,42 +1786,23 @@ class DPPYLower(Lower):
         Raises:
             Exception: If a parfor node could not be lowered to a SYCL device.
         """
+        debug = config.DEBUG
         try:
             context = self.gpu_lower.context
-            try:
-                # Only Numba's CPUContext has the `lower_extension` attribute
-                lower_extension_parfor = context.lower_extensions[parfor.Parfor]
-                context.lower_extensions[parfor.Parfor] = lower_parfor_rollback
-            except Exception as e:
-                if config.DEBUG:
-                    print(e)
-                pass
-
-            self.gpu_lower.lower()
+            with _parfor_lowering(context, lower_parfor_rollback):
+                self.gpu_lower.lower()
             # if lower does not crash, and parfor_diagnostics is empty then it
             # is a kernel function.
             if not self.gpu_lower.metadata["parfor_diagnostics"].extra_info:
-                str_name = (
-                    dpctl.get_current_queue().get_sycl_device().filter_string
-                )
                 self.gpu_lower.metadata["parfor_diagnostics"].extra_info[
                     "kernel"
-                ] = str_name
+                ] = _current_device_filter_string()
             self.base_lower = self.gpu_lower
-
-            try:
-                context.lower_extensions[parfor.Parfor] = lower_extension_parfor
-            except Exception as e:
-                if config.DEBUG:
-                    print(e)
-                pass
         except Exception as e:
-            if config.DEBUG:
+            if debug:
                 import traceback
 
-                device_filter_str = (
-                    dpctl.get_current_queue().get_sycl_device().filter_string
-                )
+                device_filter_str = _current_device_filter_string()
                 print(
                     "Failed to offload parfor to "
                     + device_filter_str
@@ -1381,7 +1811,7 @@ class DPPYLower(Lower):
                 )
                 print(traceback.format_exc())
 
-            if config.FALLBACK_ON_CPU == 1:
+            if self.cpu_lower is not None:
                 self.cpu_lower.context.lower_extensions[
                     parfor.Parfor
                 ] = _lower_parfor_parallel
@@ -1397,6 +1827,10 @@ class DPPYLower(Lower):
         return self.base_lower.create_cpython_wrapper(release_gil)
 
 
+def _current_device_filter_string():
+    return dpctl.get_current_queue().sycl_device.filter_string
+
+
 def copy_block(block):
     memo = {}
     new_block = ir.Block(block.scope, block.loc)
@@ -1407,30 +1841,27 @@ def copy_block(block):
 def lower_parfor_rollback(lowerer, parfor):
     try:
         _lower_parfor_gufunc(lowerer, parfor)
-        if config.DEBUG:
-
-            device_filter_str = (
-                dpctl.get_current_queue().get_sycl_device().filter_string
-            )
-
-            msg = "Parfor offloaded to " + device_filter_str
-            print(msg, parfor.loc)
-    except Exception as e:
-        device_filter_str = (
-            dpctl.get_current_queue().get_sycl_device().filter_string
-        )
+    except Exception:
         msg = (
-            "Failed to offload parfor to " + device_filter_str + ". Falling "
-            "back to default CPU parallelization. Please file a bug report "
-            "at https://github.com/IntelPython/numba-dppy. To help us debug "
-            "the issue, please add the traceback to the bug report."
+            f"Failed to offload parfor to {_current_device_filter_string()}. "
+            "Falling back to default CPU parallelization. Please file a bug "
+            "report at https://github.com/IntelPython/numba-dppy. To help us "
+            "debug the issue, please add the traceback to the bug report."
         )
         if not config.DEBUG:
-            msg += " Set the environment variable NUMBA_DPPY_DEBUG to 1 to "
-            msg += "generate a traceback."
+            msg += (
+                " Set the environment variable NUMBA_DPPY_DEBUG to 1 to "
+                "generate a traceback."
+            )
 
         warnings.warn(NumbaPerformanceWarning(msg, parfor.loc))
-        raise e
+        raise
+    else:
+        if config.DEBUG:
+            print(
+                f"Parfor offloaded to {_current_device_filter_string()}",
+                parfor.loc,
+            )
 
 
 def dppy_lower_array_expr(lowerer, expr):
@@ -20,7 +20,8 @@ from contextlib import contextmanager
 
 import numba
 import numpy as np
-from numba.core import errors, funcdesc, ir, lowering, types, typing, utils
+from numba.core import errors, funcdesc, ir, lowering, types, typing
+from numba.core.compiler import Flags
 from numba.core.compiler_machinery import (
     AnalysisPass,
     FunctionPass,
@@ -33,7 +34,6 @@ from numba.core.errors import (
     TypingError,
     new_error_context,
 )
-from numba.core.ir_utils import remove_dels
 from numba.parfors.parfor import Parfor
 from numba.parfors.parfor import ParforPass as _parfor_ParforPass
 from numba.parfors.parfor import PreParforPass as _parfor_PreParforPass
@@ -44,6 +44,70 @@ from numba_dppy import config
 from .dppy_lowerer import DPPYLower
 
 
+# for support numba 0.54 and <=0.55.0dev0=*_469
+_FLAGS_HAVE_MANGLE_STRING = hasattr(Flags, "get_mangle_string")
+
+# Numpy reductions are left out of the parallel replacements.
+_UNSWAPPED_FUNCTIONS = frozenset(
+    [
+        ("dot", "numpy"),
+        ("sum", "numpy"),
+        ("prod", "numpy"),
+        ("argmax", "numpy"),
+        ("max", "numpy"),
+        ("argmin", "numpy"),
+        ("min", "numpy"),
+        ("mean", "numpy"),
+    ]
+)
+
+_DPPY_FUNCTIONS_MAP = {
+    key: value
+    for key, value in swap_functions_map.items()
+    if key not in _UNSWAPPED_FUNCTIONS
+}
+
+
+def _dump_ir(pass_name, func_ir):
+    """
+    Dump ``func_ir`` after the pass ``pass_name`` if NUMBA_DUMP_IR is set or
+    the pass is listed in NUMBA_DPPY_DUMP_IR_PASSES.
+    """
+    if config.DUMP_IR or pass_name in config.DUMP_IR_PASSES:
+        name = func_ir.func_id.func_qualname
+        print(("IR DUMP: %s" % name).center(80, "-"))
+        func_ir.dump()
+
+
+def _has_local_getattr(func_ir):
+    """Check if ``func_ir`` looks up an attribute named ``local``."""
+    for block in func_ir.blocks.values():
+        for instr in block.body:
+            if isinstance(instr, ir.Assign):
+                value = instr.value
+                if (
+                    isinstance(value, ir.Expr)
+                    and value.op == "getattr"
+                    and value.attr == "local"
+                ):
+                    return True
+    return False
+
+
+def _is_constant_size(value):
+    """
+    Check if ``value`` is a literal or a global (or closure) variable holding
+    an integer, both are compile-time constants.
+    """
+    if isinstance(value, ir.Const):
+        return True
+    return (
+        isinstance(value, (ir.Global, ir.FreeVar))
+        and isinstance(value.value, int)
+        and not isinstance(value.value, bool)
+    )
+
+
 @register_pass(mutates_CFG=True, analysis_only=False)
 class DPPYConstantSizeStaticLocalMemoryPass(FunctionPass):
 
@@ -70,88 +134,89 @@ class DPPYConstantSizeStaticLocalMemoryPass(FunctionPass):
             )
             print(func_ir.dump())
 
-        work_list = list(func_ir.blocks.items())
-        while work_list:
-            label, block = work_list.pop()
-            for i, instr in enumerate(block.body):
-                if isinstance(instr, ir.Assign):
-                    expr = instr.value
-                    if isinstance(expr, ir.Expr):
-                        if expr.op == "call":
-                            find_var = block.find_variable_assignment(
-                                expr.func.name
-                            )
-                            if find_var is not None:
-                                call_node = find_var.value
-                                if (
-                                    isinstance(call_node, ir.Expr)
-                                    and call_node.op == "getattr"
-                                    and call_node.attr == "array"
-                                ):
-                                    # let's check if it is from numba_dppy.local
-                                    attr_node = block.find_variable_assignment(
-                                        call_node.value.name
-                                    ).value
-                                    if (
-                                        isinstance(attr_node, ir.Expr)
-                                        and attr_node.op == "getattr"
-                                        and attr_node.attr == "local"
-                                    ):
-
-                                        arg = None
-                                        # at first look in keyword arguments to get the shape, which has to be
-                                        # constant
-                                        if expr.kws:
-                                            for _arg in expr.kws:
-                                                if _arg[0] == "shape":
-                                                    arg = _arg[1]
-
-                                        if not arg:
-                                            arg = expr.args[0]
-
-                                        error = False
-                                        # arg can be one constant or a tuple of constant items
-                                        arg_type = func_ir.get_definition(
-                                            arg.name
-                                        )
-                                        if isinstance(arg_type, ir.Expr):
-                                            # we have a tuple
-                                            for item in arg_type.items:
-                                                if not isinstance(
-                                                    func_ir.get_definition(
-                                                        item.name
-                                                    ),
-                                                    ir.Const,
-                                                ):
-                                                    error = True
-                                                    break
-
-                                        else:
-                                            if not isinstance(
-                                                func_ir.get_definition(
-                                                    arg.name
-                                                ),
-                                                ir.Const,
-                                            ):
-                                                error = True
-                                                break
-
-                                        if error:
-                                            warnings.warn_explicit(
-                                                "The size of the Local memory has to be constant",
-                                                errors.NumbaError,
-                                                state.func_id.filename,
-                                                state.func_id.firstlineno,
-                                            )
-                                            raise
-
-        if config.DEBUG or config.DUMP_IR:
-            name = state.func_ir.func_id.func_qualname
-            print(("IR DUMP: %s" % name).center(80, "-"))
-            state.func_ir.dump()
+        # Most functions never allocate local memory, so skip the walk
+        # unless some numba_dppy.local attribute is looked up.
+        if _has_local_getattr(func_ir):
+            self._check_local_array_shapes(state)
+
+        _dump_ir(self._name, state.func_ir)
 
         return True
 
+    def _check_local_array_shapes(self, state):
+        """
+        Checks that every numba_dppy.local.array is given a constant shape.
+        """
+        func_ir = state.func_ir
+        definitions = {}
+
+        def get_definition(name):
+            try:
+                return definitions[name]
+            except KeyError:
+                value = definitions[name] = func_ir.get_definition(name)
+                return value
+
+        for block in func_ir.blocks.values():
+            # Index the block's assignments once instead of scanning the
+            # block with find_variable_assignment for every call.
+            block_defs = {}
+            calls = []
+            for instr in block.body:
+                if isinstance(instr, ir.Assign):
+                    block_defs.setdefault(instr.target.name, instr.value)
+                    expr = instr.value
+                    if isinstance(expr, ir.Expr) and expr.op == "call":
+                        calls.append(expr)
+
+            for expr in calls:
+                call_node = block_defs.get(expr.func.name)
+                if not (
+                    isinstance(call_node, ir.Expr)
+                    and call_node.op == "getattr"
+                    and call_node.attr == "array"
+                ):
+                    continue
+
+                # let's check if it is from numba_dppy.local
+                attr_node = block_defs.get(call_node.value.name)
+                if not (
+                    isinstance(attr_node, ir.Expr)
+                    and attr_node.op == "getattr"
+                    and attr_node.attr == "local"
+                ):
+                    continue
+
+                arg = None
+                # at first look in keyword arguments to get the shape, which
+                # has to be constant
+                if expr.kws:
+                    for _arg in expr.kws:
+                        if _arg[0] == "shape":
+                            arg = _arg[1]
+
+                if not arg:
+                    arg = expr.args[0]
+
+                # arg can be one constant or a tuple of constant items
+                arg_type = get_definition(arg.name)
+                if (
+                    isinstance(arg_type, ir.Expr)
+                    and arg_type.op == "build_tuple"
+                ):
+                    error = not all(
+                        _is_constant_size(get_definition(item.name))
+                        for item in arg_type.items
+                    )
+                else:
+                    error = not _is_constant_size(arg_type)
+
+                if error:
+                    raise errors.NumbaError(
+                        "The size of the Local memory has to be constant",
+                        loc=expr.loc,
+                    )
+
 
 @register_pass(mutates_CFG=True, analysis_only=False)
 class DPPYPreParforPass(FunctionPass):
@@ -168,15 +233,6 @@ class DPPYPreParforPass(FunctionPass):
 
         # Ensure we have an IR and type information.
         assert state.func_ir
-        functions_map = swap_functions_map.copy()
-        functions_map.pop(("dot", "numpy"), None)
-        functions_map.pop(("sum", "numpy"), None)
-        functions_map.pop(("prod", "numpy"), None)
-        functions_map.pop(("argmax", "numpy"), None)
-        functions_map.pop(("max", "numpy"), None)
-        functions_map.pop(("argmin", "numpy"), None)
-        functions_map.pop(("min", "numpy"), None)
-        functions_map.pop(("mean", "numpy"), None)
 
         preparfor_pass = _parfor_PreParforPass(
             state.func_ir,
@@ -186,15 +242,12 @@ class DPPYPreParforPass(FunctionPass):
             state.targetctx,
             state.flags.auto_parallel,
             state.parfor_diagnostics.replaced_fns,
-            replace_functions_map=functions_map,
+            replace_functions_map=_DPPY_FUNCTIONS_MAP,
         )
 
         preparfor_pass.run()
 
-        if config.DEBUG or config.DUMP_IR:
-            name = state.func_ir.func_id.func_qualname
-            print(("IR DUMP: %s" % name).center(80, "-"))
-            state.func_ir.dump()
+        _dump_ir(self._name, state.func_ir)
 
         return True
 
@@ -228,10 +281,7 @@ class DPPYParforPass(FunctionPass):
 
         parfor_pass.run()
 
-        if config.DEBUG or config.DUMP_IR:
-            name = state.func_ir.func_id.func_qualname
-            print(("IR DUMP: %s" % name).center(80, "-"))
-            state.func_ir.dump()
+        _dump_ir(self._name, state.func_ir)
 
         return True
 
@@ -247,9 +297,8 @@ def fallback_context(state, msg):
         if not state.status.can_fallback:
             raise
         else:
-            if utils.PYVERSION >= (3,):
-                # Clear all references attached to the traceback
-                e = e.with_traceback(None)
+            # Clear all references attached to the traceback
+            e = e.with_traceback(None)
             # this emits a warning containing the error message body in the
             # case of fallback from npm to objmode
             loop_lift = "" if state.flags.enable_looplift else "OUT"
@@ -296,11 +345,10 @@ class SpirvFriendlyLowering(LoweringPass):
             state.func_id.func_name,
         )
         with fallback_context(state, msg):
-            kwargs = {}
-
-            # for support numba 0.54 and <=0.55.0dev0=*_469
-            if hasattr(flags, "get_mangle_string"):
-                kwargs["abi_tags"] = flags.get_mangle_string()
+            if _FLAGS_HAVE_MANGLE_STRING:
+                kwargs = {"abi_tags": flags.get_mangle_string()}
+            else:
+                kwargs = {}
 
             # Lowering
             fndesc = (
@@ -382,7 +430,12 @@ class DPPYNoPythonBackend(FunctionPass):
             reload_init=state.reload_init,
         )
 
-        remove_dels(state.func_ir.blocks)
+        # Only rebuild the bodies of the blocks that do have ir.Del nodes.
+        for block in state.func_ir.blocks.values():
+            if any(isinstance(stmt, ir.Del) for stmt in block.body):
+                block.body = [
+                    stmt for stmt in block.body if not isinstance(stmt, ir.Del)
+                ]
 
         return True
 
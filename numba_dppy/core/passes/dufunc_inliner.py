@@ -125,6 +125,23 @@ def _is_dufunc_callsite(expr, block):
     return None
 
 
+def has_dufunc_callsite(func_ir):
+    """Return True if a DUFunc is loaded anywhere in ``func_ir``.
+
+    This is a cheap check to skip ``dufunc_inliner`` for functions that
+    cannot have any DUFunc call site.
+    """
+    for block in func_ir.blocks.values():
+        for instr in block.body:
+            if isinstance(instr, ir.Assign) and isinstance(
+                instr.value, (ir.Global, ir.FreeVar)
+            ):
+                # due to circular import we can not import DUFunc
+                if instr.value.value.__class__.__name__ == "DUFunc":
+                    return True
+    return False
+
+
 def dufunc_inliner(func_ir, calltypes, typemap, typingctx, targetctx):
     _DEBUG = False
     modified = False
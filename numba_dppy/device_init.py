@@ -24,11 +24,15 @@ from .ocl.stubs import (
     get_local_id,
     get_local_size,
     get_num_groups,
+    get_num_sub_groups,
+    get_sub_group_id,
+    get_sub_group_local_id,
     get_work_dim,
     local,
     mem_fence,
     private,
     sub_group_barrier,
+    sub_group_reduce_add,
 )
 
 """
@@ -39,18 +43,24 @@ from .dpnp_iface.stubs import dpnp
 
 DEFAULT_LOCAL_SIZE = []
 
+import functools
+
 import dpctl
 
 from . import initialize, target
 from .decorators import autojit, func, kernel
 
 
+@functools.lru_cache(maxsize=None)
 def is_available():
     """Returns a boolean indicating if dpctl could find a default device.
 
     A valueError is thrown by dpctl if no default device is found and it
     implies that numba-dppy cannot create a SYCL queue to compile kernels.
 
+    The result is computed once, ``is_available.cache_clear()`` makes the
+    next call query dpctl again.
+
     Returns:
         bool: True if a default SYCL device is found, otherwise False.
     """
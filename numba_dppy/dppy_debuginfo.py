@@ -20,17 +20,12 @@ from numba_dppy.numba_support import numba_version
 
 
 class DPPYDIBuilder(DIBuilder):
-    def __init__(self, module, filepath, linkage_name, cgctx):
-        args = []
-
-        if numba_version > (0, 54):
-            args.append(cgctx)
-
-        DIBuilder.__init__(self, module, filepath, *args)
-        self.linkage_name = linkage_name
-
     if numba_version > (0, 54):
 
+        def __init__(self, module, filepath, linkage_name, cgctx):
+            DIBuilder.__init__(self, module, filepath, cgctx)
+            self.linkage_name = linkage_name
+
         def mark_subprogram(self, function, qualname, argnames, argtypes, line):
             name = qualname
             argmap = dict(zip(argnames, argtypes))
@@ -47,6 +42,10 @@ class DPPYDIBuilder(DIBuilder):
 
     else:
 
+        def __init__(self, module, filepath, linkage_name, cgctx):
+            DIBuilder.__init__(self, module, filepath)
+            self.linkage_name = linkage_name
+
         def mark_subprogram(self, function, name, line):
             di_subp = self._add_subprogram(
                 name=name, linkagename=self.linkage_name, line=line
@@ -57,8 +56,11 @@ class DPPYDIBuilder(DIBuilder):
 
     def _di_compile_unit(self):
         di = super()._di_compile_unit()
-        operands = dict(di.operands)
-        operands["language"] = ir.DIToken("DW_LANG_C_plus_plus")
-        operands["producer"] = "numba-dppy"
-        di.operands = tuple(operands.items())
+        overrides = {
+            "language": ir.DIToken("DW_LANG_C_plus_plus"),
+            "producer": "numba-dppy",
+        }
+        di.operands = tuple(
+            (key, overrides.get(key, value)) for key, value in di.operands
+        )
         return di
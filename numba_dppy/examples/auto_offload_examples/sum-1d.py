@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import dpctl
+import dpctl.tensor.numpy_usm_shared as usmarray
 import numpy as np
 from numba import njit
 
@@ -31,8 +32,10 @@ def main():
     N = global_size * local_size
     print("N", N)
 
-    a = np.ones(N, dtype=np.float32)
-    b = np.ones(N, dtype=np.float32)
+    # USM shared arrays are read by the offloaded kernel in place, numpy
+    # arrays would be copied to the device and back.
+    a = usmarray.ones(N, dtype=np.float32)
+    b = usmarray.ones(N, dtype=np.float32)
 
     print("a:", a, hex(a.ctypes.data))
     print("b:", b, hex(b.ctypes.data))
@@ -48,10 +51,9 @@ def main():
         c = f1(a, b)
 
     print("RESULT c:", c, hex(c.ctypes.data))
-    for i in range(N):
-        if c[i] != 2.0:
-            print("First index not equal to 2.0 was", i)
-            break
+    bad = np.flatnonzero(c != 2.0)
+    if bad.size:
+        print("First index not equal to 2.0 was", bad[0])
 
     print("Done...")
 
@@ -12,44 +12,94 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import math
-
 import dpctl
+import dpctl.tensor as dpt
 import numpy as np
+from numba import float32, njit, prange
 
 import numba_dppy as dppy
 
 
 @dppy.kernel
 def sum_reduction_kernel(A, R, stride):
+    """
+    Reduces ``A[i] + A[i + stride]`` over every work-group and stores the sum
+    of the work-group into ``R``.
+    """
     i = dppy.get_global_id(0)
-    # sum two element
-    R[i] = A[i] + A[i + stride]
-    # store the sum to be used in nex iteration
-    A[i] = R[i]
 
+    # one partial sum per sub-group of the work-group
+    sub_group_sums = dppy.local.array(64, float32)
 
-def sum_reduce(A):
-    """Size of A should be power of two."""
+    # sum two element, then sum them over the sub-group without going
+    # through local memory
+    sub_group_sum = dppy.sub_group_reduce_add(A[i] + A[i + stride])
+    if dppy.get_sub_group_local_id() == 0:
+        sub_group_sums[dppy.get_sub_group_id()] = sub_group_sum
+
+    dppy.barrier(dppy.CLK_LOCAL_MEM_FENCE)
+
+    if dppy.get_local_id(0) == 0:
+        group_sum = sub_group_sums[0]
+        for j in range(1, dppy.get_num_sub_groups()):
+            group_sum += sub_group_sums[j]
+        R[dppy.get_group_id(0)] = group_sum
+
+
+@njit(parallel=True, fastmath=True)
+def sum_reduce_cpu(A):
+    """
+    Reduces ``A`` with a ``prange`` reduction on the host. ``fastmath`` lets
+    LLVM reorder the additions to vectorize the loop.
+    """
+    s = 0.0
+    for i in prange(A.shape[0]):
+        s += A[i]
+    return s
+
+
+def sum_reduce_gpu(A, device):
+    """Size of A should be power of two and its dtype float32."""
+    # the partial sums are kept in a float32 local array by the kernel
+    assert A.dtype == np.float32
     total = len(A)
-    # max size will require half the size of A to store sum
-    R = np.array(np.random.random(math.ceil(total / 2)), dtype=A.dtype)
+    global_size = total // 2
+    # there can not be more sub-groups than sub_group_sums in the kernel
+    work_group_size = min(64, global_size)
+    nb_work_groups = global_size // work_group_size
+
+    # one partial sum per work-group
+    R = np.empty(nb_work_groups, dtype=A.dtype)
 
+    with dpctl.device_context(device):
+        # Keep the data in device memory so that only A is copied to the
+        # device and only the partial sums are copied back.
+        dA = dpt.usm_ndarray(A.shape, dtype=A.dtype, buffer="device")
+        dA.usm_data.copy_from_host(A.reshape((-1)).view("|u1"))
+
+        dR = dpt.usm_ndarray(R.shape, dtype=R.dtype, buffer="device")
+
+        sum_reduction_kernel[global_size, work_group_size](dA, dR, global_size)
+
+        dR.usm_data.copy_to_host(R.view("|u1"))
+
+    # the few partial sums are added on the host
+    return R.sum()
+
+
+def sum_reduce(A):
+    """Size of A should be power of two."""
     # Use the environment variable SYCL_DEVICE_FILTER to change the default device.
     # See https://github.com/intel/llvm/blob/sycl/sycl/doc/EnvironmentVariables.md#sycl_device_filter.
     device = dpctl.select_default_device()
     print("Using device ...")
     device.print_device_info()
 
-    with dpctl.device_context(device):
-        while total > 1:
-            global_size = total // 2
-            sum_reduction_kernel[global_size, dppy.DEFAULT_LOCAL_SIZE](
-                A, R, global_size
-            )
-            total = total // 2
+    # On a CPU the kernel launch costs more than a parallel loop on the host.
+    if device.device_type == dpctl.device_type.cpu:
+        return sum_reduce_cpu(A)
 
-    return R[0]
+    return sum_reduce_gpu(A, device)
 
 
 def test_sum_reduce():
@@ -57,11 +107,10 @@ def test_sum_reduce():
     N = 2048
     assert N % 2 == 0
 
-    A = np.array(np.random.random(N), dtype=np.float32)
-    A_copy = A.copy()
+    A = np.random.random(N).astype(np.float32)
 
     actual = sum_reduce(A)
-    expected = A_copy.sum()
+    expected = A.sum()
 
     print("Actual:  ", actual)
     print("Expected:", expected)
@@ -71,6 +71,58 @@
         } while (found != expected);
         return found;
     }
+
+    double numba_dppy_atomic_min_f64_local(volatile __generic double *p, double val) {
+        double  found = *p;
+        double  expected;
+        do {
+            expected = found;
+            // nothing to store, avoid contending on the value
+            if (fmin(expected, val) == expected)
+                break;
+            found = numba_dppy_atomic_cmpxchg_f64_local(p, expected, fmin(expected, val));
+        } while (found != expected);
+        return found;
+    }
+
+    double numba_dppy_atomic_min_f64_global(volatile __generic double *p, double val) {
+        double  found = *p;
+        double  expected;
+        do {
+            expected = found;
+            // nothing to store, avoid contending on the value
+            if (fmin(expected, val) == expected)
+                break;
+            found = numba_dppy_atomic_cmpxchg_f64_global(p, expected, fmin(expected, val));
+        } while (found != expected);
+        return found;
+    }
+
+    double numba_dppy_atomic_max_f64_local(volatile __generic double *p, double val) {
+        double  found = *p;
+        double  expected;
+        do {
+            expected = found;
+            // nothing to store, avoid contending on the value
+            if (fmax(expected, val) == expected)
+                break;
+            found = numba_dppy_atomic_cmpxchg_f64_local(p, expected, fmax(expected, val));
+        } while (found != expected);
+        return found;
+    }
+
+    double numba_dppy_atomic_max_f64_global(volatile __generic double *p, double val) {
+        double  found = *p;
+        double  expected;
+        do {
+            expected = found;
+            // nothing to store, avoid contending on the value
+            if (fmax(expected, val) == expected)
+                break;
+            found = numba_dppy_atomic_cmpxchg_f64_global(p, expected, fmax(expected, val));
+        } while (found != expected);
+        return found;
+    }
   #endif
 #endif
 
@@ -137,3 +189,55 @@ float numba_dppy_atomic_sub_f32_global(volatile __generic float *p, float val) {
     } while (found != expected);
     return found;
 }
+
+float numba_dppy_atomic_min_f32_local(volatile __generic float *p, float val) {
+    float found = *p;
+    float expected;
+    do {
+        expected = found;
+        // nothing to store, avoid contending on the value
+        if (fmin(expected, val) == expected)
+            break;
+        found = numba_dppy_atomic_cmpxchg_f32_local(p, expected, fmin(expected, val));
+    } while (found != expected);
+    return found;
+}
+
+float numba_dppy_atomic_min_f32_global(volatile __generic float *p, float val) {
+    float found = *p;
+    float expected;
+    do {
+        expected = found;
+        // nothing to store, avoid contending on the value
+        if (fmin(expected, val) == expected)
+            break;
+        found = numba_dppy_atomic_cmpxchg_f32_global(p, expected, fmin(expected, val));
+    } while (found != expected);
+    return found;
+}
+
+float numba_dppy_atomic_max_f32_local(volatile __generic float *p, float val) {
+    float found = *p;
+    float expected;
+    do {
+        expected = found;
+        // nothing to store, avoid contending on the value
+        if (fmax(expected, val) == expected)
+            break;
+        found = numba_dppy_atomic_cmpxchg_f32_local(p, expected, fmax(expected, val));
+    } while (found != expected);
+    return found;
+}
+
+float numba_dppy_atomic_max_f32_global(volatile __generic float *p, float val) {
+    float found = *p;
+    float expected;
+    do {
+        expected = found;
+        // nothing to store, avoid contending on the value
+        if (fmax(expected, val) == expected)
+            break;
+        found = numba_dppy_atomic_cmpxchg_f32_global(p, expected, fmax(expected, val));
+    } while (found != expected);
+    return found;
+}
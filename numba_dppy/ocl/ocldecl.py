@@ -96,6 +96,40 @@ class Ocl_sub_group_barrier(ConcreteTemplate):
     cases = [signature(types.void)]
 
 
+@intrinsic
+class Ocl_get_sub_group_local_id(ConcreteTemplate):
+    key = dppy.get_sub_group_local_id
+    cases = [signature(types.intp)]
+
+
+@intrinsic
+class Ocl_get_sub_group_id(ConcreteTemplate):
+    key = dppy.get_sub_group_id
+    cases = [signature(types.intp)]
+
+
+@intrinsic
+class Ocl_get_num_sub_groups(ConcreteTemplate):
+    key = dppy.get_num_sub_groups
+    cases = [signature(types.intp)]
+
+
+@intrinsic
+class Ocl_sub_group_reduce_add(ConcreteTemplate):
+    key = dppy.sub_group_reduce_add
+    cases = [
+        signature(ty, ty)
+        for ty in (
+            types.int32,
+            types.uint32,
+            types.int64,
+            types.uint64,
+            types.float32,
+            types.float64,
+        )
+    ]
+
+
 # dppy.atomic submodule -------------------------------------------------------
 
 
@@ -127,6 +161,34 @@ class Ocl_atomic_sub(AbstractTemplate):
             return signature(ary.dtype, ary, idx, ary.dtype)
 
 
+@intrinsic
+class Ocl_atomic_min(AbstractTemplate):
+    key = dppy.atomic.min
+
+    def generic(self, args, kws):
+        assert not kws
+        ary, idx, val = args
+
+        if ary.ndim == 1:
+            return signature(ary.dtype, ary, types.intp, ary.dtype)
+        elif ary.ndim > 1:
+            return signature(ary.dtype, ary, idx, ary.dtype)
+
+
+@intrinsic
+class Ocl_atomic_max(AbstractTemplate):
+    key = dppy.atomic.max
+
+    def generic(self, args, kws):
+        assert not kws
+        ary, idx, val = args
+
+        if ary.ndim == 1:
+            return signature(ary.dtype, ary, types.intp, ary.dtype)
+        elif ary.ndim > 1:
+            return signature(ary.dtype, ary, idx, ary.dtype)
+
+
 @intrinsic_attr
 class OclAtomicTemplate(AttributeTemplate):
     key = types.Module(dppy.atomic)
@@ -137,9 +199,17 @@ class OclAtomicTemplate(AttributeTemplate):
     def resolve_sub(self, mod):
         return types.Function(Ocl_atomic_sub)
 
+    def resolve_min(self, mod):
+        return types.Function(Ocl_atomic_min)
+
+    def resolve_max(self, mod):
+        return types.Function(Ocl_atomic_max)
+
 
 intrinsic_global(dppy.atomic.add, types.Function(Ocl_atomic_add))
 intrinsic_global(dppy.atomic.sub, types.Function(Ocl_atomic_sub))
+intrinsic_global(dppy.atomic.min, types.Function(Ocl_atomic_min))
+intrinsic_global(dppy.atomic.max, types.Function(Ocl_atomic_max))
 
 # dppy.local submodule -------------------------------------------------------
 
@@ -266,6 +336,18 @@ class OclModuleTemplate(AttributeTemplate):
     def resolve_sub_group_barrier(self, mod):
         return types.Function(Ocl_sub_group_barrier)
 
+    def resolve_get_sub_group_local_id(self, mod):
+        return types.Function(Ocl_get_sub_group_local_id)
+
+    def resolve_get_sub_group_id(self, mod):
+        return types.Function(Ocl_get_sub_group_id)
+
+    def resolve_get_num_sub_groups(self, mod):
+        return types.Function(Ocl_get_num_sub_groups)
+
+    def resolve_sub_group_reduce_add(self, mod):
+        return types.Function(Ocl_sub_group_reduce_add)
+
     def resolve_atomic(self, mod):
         return types.Module(dppy.atomic)
 
@@ -12,8 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import operator
-from functools import reduce
+import functools
+from math import prod
 
 import dpctl
 import llvmlite.binding as ll
@@ -25,7 +25,9 @@ from numba.core.imputils import Registry
 from numba.core.itanium_mangler import mangle, mangle_c, mangle_type
 from numba.core.typing.npydecl import parse_dtype
 
-from numba_dppy import config, target
+from numba_dppy import config
+from numba_dppy import extended_numba_itanium_mangler as ext_itanium_mangler
+from numba_dppy import target
 from numba_dppy.codegen import SPIR_DATA_LAYOUT
 from numba_dppy.dppy_array_type import DPPYArray
 from numba_dppy.ocl.atomics import atomic_helper
@@ -69,14 +71,42 @@ def _declare_function(context, builder, name, sig, cargs, mangler=mangle_c):
         llretty = lc.Type.void()
     else:
         llretty = context.get_value_type(sig.return_type)
-    llargs = [context.get_value_type(t) for t in sig.args]
-    fnty = Type.function(llretty, llargs)
-    mangled = mangler(name, cargs)
+    llargs = tuple(context.get_value_type(t) for t in sig.args)
+    fnty, mangled = _builtin_function_type(
+        llretty, llargs, name, tuple(cargs), mangler
+    )
     fn = cgutils.get_or_insert_function(mod, fnty, mangled)
     fn.calling_convention = target.CC_SPIR_FUNC
+    for attr in _builtin_function_attributes.get(name, ()):
+        fn.attributes.add(attr)
     return fn
 
 
+# Work-item queries have no side effects, so LLVM can merge and hoist their
+# calls. Synchronization must not be duplicated or moved across control flow.
+_builtin_function_attributes = {
+    "get_global_id": ("readnone", "nounwind"),
+    "get_local_id": ("readnone", "nounwind"),
+    "get_group_id": ("readnone", "nounwind"),
+    "get_num_groups": ("readnone", "nounwind"),
+    "get_global_size": ("readnone", "nounwind"),
+    "get_local_size": ("readnone", "nounwind"),
+    "get_work_dim": ("readnone", "nounwind"),
+    "barrier": ("convergent", "nounwind"),
+    "mem_fence": ("convergent", "nounwind"),
+    "sub_group_reduce_add": ("convergent", "nounwind"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _builtin_function_type(llretty, llargs, name, cargs, mangler):
+    """
+    Build the LLVM function type and the mangled symbol of a builtin once,
+    builtins like get_global_id are declared for every call site.
+    """
+    return Type.function(llretty, list(llargs)), mangler(name, cargs)
+
+
 @lower(stubs.get_global_id, types.uint32)
 def get_global_id_impl(context, builder, sig, args):
     [dim] = args
@@ -190,46 +220,132 @@ def sub_group_barrier_impl(context, builder, sig, args):
     return _void_value
 
 
+@lower(stubs.get_sub_group_local_id)
+def get_sub_group_local_id_impl(context, builder, sig, args):
+    assert not args
+    sig = types.uint32()
+    get_sub_group_local_id = _declare_function(
+        context, builder, "get_sub_group_local_id", sig, ["void"]
+    )
+    res = builder.call(get_sub_group_local_id, [])
+    return context.cast(builder, res, types.uint32, types.intp)
+
+
+@lower(stubs.get_sub_group_id)
+def get_sub_group_id_impl(context, builder, sig, args):
+    assert not args
+    sig = types.uint32()
+    get_sub_group_id = _declare_function(
+        context, builder, "get_sub_group_id", sig, ["void"]
+    )
+    res = builder.call(get_sub_group_id, [])
+    return context.cast(builder, res, types.uint32, types.intp)
+
+
+@lower(stubs.get_num_sub_groups)
+def get_num_sub_groups_impl(context, builder, sig, args):
+    assert not args
+    sig = types.uint32()
+    get_num_sub_groups = _declare_function(
+        context, builder, "get_num_sub_groups", sig, ["void"]
+    )
+    res = builder.call(get_num_sub_groups, [])
+    return context.cast(builder, res, types.uint32, types.intp)
+
+
+_sub_group_reduce_c_types = {
+    types.int32: "int",
+    types.uint32: "unsigned int",
+    types.int64: "long",
+    types.uint64: "unsigned long",
+    types.float32: "float",
+    types.float64: "double",
+}
+
+
+@lower(stubs.sub_group_reduce_add, types.int32)
+@lower(stubs.sub_group_reduce_add, types.uint32)
+@lower(stubs.sub_group_reduce_add, types.int64)
+@lower(stubs.sub_group_reduce_add, types.uint64)
+@lower(stubs.sub_group_reduce_add, types.float32)
+@lower(stubs.sub_group_reduce_add, types.float64)
+def sub_group_reduce_add_impl(context, builder, sig, args):
+    [value] = args
+    [valty] = sig.args
+    sub_group_reduce_add = _declare_function(
+        context,
+        builder,
+        "sub_group_reduce_add",
+        sig,
+        [_sub_group_reduce_c_types[valty]],
+    )
+    return builder.call(sub_group_reduce_add, [value])
+
+
+_atomic_fp_types = (types.float32, types.float64)
+_atomic_int_types = (types.int32, types.int64)
+
+_atomic_pointer_types = {
+    types.float32: ir.PointerType(ir.FloatType(), address_space.GENERIC),
+    types.float64: ir.PointerType(ir.DoubleType(), address_space.GENERIC),
+}
+
+# (dtype, operation) -> (generic pointer type, helper function name)
+_atomic_functions = {
+    (types.float32, "add"): (
+        _atomic_pointer_types[types.float32],
+        "numba_dppy_atomic_add_f32",
+    ),
+    (types.float32, "sub"): (
+        _atomic_pointer_types[types.float32],
+        "numba_dppy_atomic_sub_f32",
+    ),
+    (types.float32, "min"): (
+        _atomic_pointer_types[types.float32],
+        "numba_dppy_atomic_min_f32",
+    ),
+    (types.float32, "max"): (
+        _atomic_pointer_types[types.float32],
+        "numba_dppy_atomic_max_f32",
+    ),
+    (types.float64, "add"): (
+        _atomic_pointer_types[types.float64],
+        "numba_dppy_atomic_add_f64",
+    ),
+    (types.float64, "sub"): (
+        _atomic_pointer_types[types.float64],
+        "numba_dppy_atomic_sub_f64",
+    ),
+    (types.float64, "min"): (
+        _atomic_pointer_types[types.float64],
+        "numba_dppy_atomic_min_f64",
+    ),
+    (types.float64, "max"): (
+        _atomic_pointer_types[types.float64],
+        "numba_dppy_atomic_max_f64",
+    ),
+}
+
+
 def insert_and_call_atomic_fn(
     context, builder, sig, fn_type, dtype, ptr, val, addrspace
 ):
-    ll_p = None
-    name = ""
-    if dtype.name == "float32":
-        ll_val = ir.FloatType()
-        ll_p = ll_val.as_pointer()
-        if fn_type == "add":
-            name = "numba_dppy_atomic_add_f32"
-        elif fn_type == "sub":
-            name = "numba_dppy_atomic_sub_f32"
-        else:
-            raise TypeError("Operation type is not supported %s" % (fn_type))
-    elif dtype.name == "float64":
-        if True:
-            ll_val = ir.DoubleType()
-            ll_p = ll_val.as_pointer()
-            if fn_type == "add":
-                name = "numba_dppy_atomic_add_f64"
-            elif fn_type == "sub":
-                name = "numba_dppy_atomic_sub_f64"
-            else:
-                raise TypeError(
-                    "Operation type is not supported %s" % (fn_type)
-                )
-    else:
+    try:
+        ll_p, name = _atomic_functions[(dtype, fn_type)]
+    except KeyError:
+        if dtype not in _atomic_pointer_types:
+            raise TypeError(
+                "Atomic operation is not supported for type %s" % (dtype.name)
+            ) from None
         raise TypeError(
-            "Atomic operation is not supported for type %s" % (dtype.name)
-        )
+            "Operation type is not supported %s" % (fn_type)
+        ) from None
 
     if addrspace == address_space.LOCAL:
         name = name + "_local"
     else:
         name = name + "_global"
 
-    assert ll_p is not None
-    assert name != ""
-    ll_p.addrspace = address_space.GENERIC
-
     mod = builder.module
     if sig.return_type == types.void:
         llretty = lc.Type.void()
@@ -247,7 +363,68 @@ def insert_and_call_atomic_fn(
     return builder.call(fn, [generic_ptr, val])
 
 
+# operation -> (SPIR-V function, SPIR-V extension), the floating point
+# extensions have no subtraction
+_native_fp_atomic_functions = {
+    "add": ("__spirv_AtomicFAddEXT", "SPV_EXT_shader_atomic_float_add"),
+    "min": ("__spirv_AtomicFMinEXT", "SPV_EXT_shader_atomic_float_min_max"),
+    "max": ("__spirv_AtomicFMaxEXT", "SPV_EXT_shader_atomic_float_min_max"),
+}
+
+# Native atomics are relaxed and device scoped
+_spirv_scope = atomic_helper.get_scope(atomic_helper.sycl_memory_scope.device)
+_spirv_memory_semantics_mask = atomic_helper.get_memory_semantics_mask(
+    atomic_helper.sycl_memory_order.relaxed
+)
+
+_native_int_atomic_functions = {
+    "add": "__spirv_AtomicIAdd",
+    "sub": "__spirv_AtomicISub",
+    "min": "__spirv_AtomicSMin",
+    "max": "__spirv_AtomicSMax",
+}
+
+
+def _add_spirv_extension(context, extension):
+    llvm_spirv_args = context.extra_compile_options.setdefault(
+        target.LLVM_SPIRV_ARGS, []
+    )
+    arg = "--spirv-ext=+" + extension
+    if arg not in llvm_spirv_args:
+        llvm_spirv_args.append(arg)
+
+
+@functools.lru_cache(maxsize=None)
+def _mangle_native_atomic(name, dtype, addrspace, valty):
+    """
+    Mangle a SPIR-V atomic function once per operation, element type and
+    address space.
+    """
+    numba_ptr_ty = types.CPointer(dtype, addrspace=addrspace)
+    return ext_itanium_mangler.mangle(
+        name,
+        [
+            numba_ptr_ty,
+            "__spv.Scope.Flag",
+            "__spv.MemorySemanticsMask.Flag",
+            valty,
+        ],
+    )
+
+
 def native_atomic_add(context, builder, sig, args):
+    return _native_atomic(context, builder, sig, args, "add")
+
+
+def native_atomic_sub(context, builder, sig, args):
+    return _native_atomic(context, builder, sig, args, "sub")
+
+
+def native_atomic_minmax(context, builder, sig, args, op):
+    return _native_atomic(context, builder, sig, args, op)
+
+
+def _native_atomic(context, builder, sig, args, op):
     aryty, indty, valty = sig.args
     ary, inds, val = args
     dtype = aryty.dtype
@@ -273,13 +450,11 @@ def native_atomic_add(context, builder, sig, args):
     lary = context.make_array(aryty)(context, builder, ary)
     ptr = cgutils.get_item_pointer(context, builder, aryty, lary, indices)
 
-    if dtype == types.float32 or dtype == types.float64:
-        context.extra_compile_options[target.LLVM_SPIRV_ARGS] = [
-            "--spirv-ext=+SPV_EXT_shader_atomic_float_add"
-        ]
-        name = "__spirv_AtomicFAddEXT"
-    elif dtype == types.int32 or dtype == types.int64:
-        name = "__spirv_AtomicIAdd"
+    if dtype in _atomic_fp_types:
+        name, extension = _native_fp_atomic_functions[op]
+        _add_spirv_extension(context, extension)
+    elif dtype in _atomic_int_types:
+        name = _native_int_atomic_functions[op]
     else:
         raise TypeError("Unsupported type")
 
@@ -296,113 +471,124 @@ def native_atomic_add(context, builder, sig, args):
         context.get_value_type(sig.args[2]),
     ]
 
-    from numba_dppy import extended_numba_itanium_mangler as ext_itanium_mangler
-
-    numba_ptr_ty = types.CPointer(dtype, addrspace=ptr_type.addrspace)
-    mangled_fn_name = ext_itanium_mangler.mangle(
-        name,
-        [
-            numba_ptr_ty,
-            "__spv.Scope.Flag",
-            "__spv.MemorySemanticsMask.Flag",
-            valty,
-        ],
+    mangled_fn_name = _mangle_native_atomic(
+        name, dtype, ptr_type.addrspace, valty
     )
 
     fnty = ir.FunctionType(retty, spirv_fn_arg_types)
     fn = cgutils.get_or_insert_function(builder.module, fnty, mangled_fn_name)
     fn.calling_convention = target.CC_SPIR_FUNC
+    # SPIR-V atomics never unwind and only access the memory they point to
+    fn.attributes.add("nounwind")
+    fn.attributes.add("argmemonly")
 
-    sycl_memory_order = atomic_helper.sycl_memory_order.relaxed
-    sycl_memory_scope = atomic_helper.sycl_memory_scope.device
-    spirv_scope = atomic_helper.get_scope(sycl_memory_scope)
-    spirv_memory_semantics_mask = atomic_helper.get_memory_semantics_mask(
-        sycl_memory_order
-    )
     fn_args = [
         ptr,
-        context.get_constant(types.int32, spirv_scope),
-        context.get_constant(types.int32, spirv_memory_semantics_mask),
+        context.get_constant(types.int32, _spirv_scope),
+        context.get_constant(types.int32, _spirv_memory_semantics_mask),
         val,
     ]
 
     return builder.call(fn, fn_args)
 
 
+def _use_native_fp_atomics():
+    # Only ask dpctl for the current device when native FP atomics are
+    # enabled, this is a call into the SYCL runtime.
+    return (
+        config.NATIVE_FP_ATOMICS == 1
+        and dpctl.get_current_queue().sycl_device.device_type
+        == dpctl.device_type.gpu
+    )
+
+
 @lower(stubs.atomic.add, types.Array, types.intp, types.Any)
 @lower(stubs.atomic.add, types.Array, types.UniTuple, types.Any)
 @lower(stubs.atomic.add, types.Array, types.Tuple, types.Any)
 def atomic_add_tuple(context, builder, sig, args):
-    device_type = dpctl.get_current_queue().sycl_device.device_type
     dtype = sig.args[0].dtype
 
-    if dtype == types.float32 or dtype == types.float64:
-        if (
-            device_type == dpctl.device_type.gpu
-            and config.NATIVE_FP_ATOMICS == 1
-        ):
+    if dtype in _atomic_fp_types:
+        if _use_native_fp_atomics():
             return native_atomic_add(context, builder, sig, args)
         else:
             # Currently, DPCPP only supports native floating point
             # atomics for GPUs.
             return atomic_add(context, builder, sig, args, "add")
-    elif dtype == types.int32 or dtype == types.int64:
+    elif dtype in _atomic_int_types:
         return native_atomic_add(context, builder, sig, args)
     else:
         raise TypeError("Atomic operation on unsupported type %s" % dtype)
 
 
 def atomic_sub_wrapper(context, builder, sig, args):
-    # dpcpp yet does not support ``__spirv_AtomicFSubEXT``. To support atomic.sub we
-    # reuse atomic.add and negate the value. For example, atomic.add(A, index, -val) is
-    # equivalent to atomic.sub(A, index, val).
-    val = args[2]
-    new_val = cgutils.alloca_once(
-        builder,
-        context.get_value_type(sig.args[2]),
-        size=context.get_constant(types.uintp, 1),
-        name="new_val_0",
-    )
     val_dtype = sig.args[2]
-    if val_dtype == types.float32 or val_dtype == types.float64:
-        builder.store(
-            builder.fmul(val, context.get_constant(sig.args[2], -1)), new_val
-        )
-    elif val_dtype == types.int32 or val_dtype == types.int64:
-        builder.store(
-            builder.mul(val, context.get_constant(sig.args[2], -1)), new_val
-        )
+    if val_dtype in _atomic_int_types:
+        return native_atomic_sub(context, builder, sig, args)
+    elif val_dtype in _atomic_fp_types:
+        # SPIR-V has no ``__spirv_AtomicFSubEXT``. To support atomic.sub we
+        # reuse atomic.add and negate the value. For example,
+        # atomic.add(A, index, -val) is equivalent to atomic.sub(A, index, val).
+        args = list(args)
+        args[2] = builder.fmul(args[2], context.get_constant(val_dtype, -1))
+        return native_atomic_add(context, builder, sig, args)
     else:
         raise TypeError("Unsupported type %s" % val_dtype)
 
-    args[2] = builder.load(new_val)
-
-    return native_atomic_add(context, builder, sig, args)
-
 
 @lower(stubs.atomic.sub, types.Array, types.intp, types.Any)
 @lower(stubs.atomic.sub, types.Array, types.UniTuple, types.Any)
 @lower(stubs.atomic.sub, types.Array, types.Tuple, types.Any)
 def atomic_sub_tuple(context, builder, sig, args):
-    device_type = dpctl.get_current_queue().sycl_device.device_type
     dtype = sig.args[0].dtype
 
-    if dtype == types.float32 or dtype == types.float64:
-        if (
-            device_type == dpctl.device_type.gpu
-            and config.NATIVE_FP_ATOMICS == 1
-        ):
+    if dtype in _atomic_fp_types:
+        if _use_native_fp_atomics():
             return atomic_sub_wrapper(context, builder, sig, args)
         else:
             # Currently, DPCPP only supports native floating point
             # atomics for GPUs.
             return atomic_add(context, builder, sig, args, "sub")
-    elif dtype == types.int32 or dtype == types.int64:
+    elif dtype in _atomic_int_types:
         return atomic_sub_wrapper(context, builder, sig, args)
     else:
         raise TypeError("Atomic operation on unsupported type %s" % dtype)
 
 
+@lower(stubs.atomic.min, types.Array, types.intp, types.Any)
+@lower(stubs.atomic.min, types.Array, types.UniTuple, types.Any)
+@lower(stubs.atomic.min, types.Array, types.Tuple, types.Any)
+def atomic_min_tuple(context, builder, sig, args):
+    dtype = sig.args[0].dtype
+
+    if dtype in _atomic_fp_types:
+        if _use_native_fp_atomics():
+            return native_atomic_minmax(context, builder, sig, args, "min")
+        else:
+            return atomic_add(context, builder, sig, args, "min")
+    elif dtype in _atomic_int_types:
+        return native_atomic_minmax(context, builder, sig, args, "min")
+    else:
+        raise TypeError("Atomic operation on unsupported type %s" % dtype)
+
+
+@lower(stubs.atomic.max, types.Array, types.intp, types.Any)
+@lower(stubs.atomic.max, types.Array, types.UniTuple, types.Any)
+@lower(stubs.atomic.max, types.Array, types.Tuple, types.Any)
+def atomic_max_tuple(context, builder, sig, args):
+    dtype = sig.args[0].dtype
+
+    if dtype in _atomic_fp_types:
+        if _use_native_fp_atomics():
+            return native_atomic_minmax(context, builder, sig, args, "max")
+        else:
+            return atomic_add(context, builder, sig, args, "max")
+    elif dtype in _atomic_int_types:
+        return native_atomic_minmax(context, builder, sig, args, "max")
+    else:
+        raise TypeError("Atomic operation on unsupported type %s" % dtype)
+
+
 def atomic_add(context, builder, sig, args, name):
     from .atomics import atomic_support_present
 
@@ -527,7 +713,7 @@ def _generic_array(context, builder, shape, dtype, symbol_name, addrspace):
     This function allows us to create generic arrays in different
     address spaces.
     """
-    elemcount = reduce(operator.mul, shape)
+    elemcount = prod(shape)
     lldtype = context.get_data_type(dtype)
     laryty = Type.array(lldtype, elemcount)
 
@@ -575,14 +761,8 @@ def _make_array(
     aryty = DPPYArray(dtype=dtype, ndim=ndim, layout="C", addrspace=addrspace)
     ary = context.make_array(aryty)(context, builder)
 
-    targetdata = _get_target_data(context)
-    lldtype = context.get_data_type(dtype)
-    itemsize = lldtype.get_abi_size(targetdata)
-    # Compute strides
-    rstrides = [itemsize]
-    for i, lastsize in enumerate(reversed(shape[1:])):
-        rstrides.append(lastsize * rstrides[-1])
-    strides = [s for s in reversed(rstrides)]
+    itemsize = _get_itemsize(context, dtype)
+    strides = _compute_strides(tuple(shape), itemsize)
 
     kshape = [context.get_constant(types.intp, s) for s in shape]
     kstrides = [context.get_constant(types.intp, s) for s in strides]
@@ -599,5 +779,30 @@ def _make_array(
     return ary._getvalue()
 
 
-def _get_target_data(context):
-    return ll.create_target_data(SPIR_DATA_LAYOUT[context.address_size])
+@functools.lru_cache(maxsize=None)
+def _compute_strides(shape, itemsize):
+    """Strides of a C-contiguous array of ``shape``."""
+    rstrides = [itemsize]
+    for lastsize in reversed(shape[1:]):
+        rstrides.append(lastsize * rstrides[-1])
+    return tuple(reversed(rstrides))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_target_data(address_size):
+    return ll.create_target_data(SPIR_DATA_LAYOUT[address_size])
+
+
+# (dtype, address size) -> ABI size of the dtype
+_itemsizes = {}
+
+
+def _get_itemsize(context, dtype):
+    key = (dtype, context.address_size)
+    try:
+        return _itemsizes[key]
+    except KeyError:
+        targetdata = _get_target_data(context.address_size)
+        lldtype = context.get_data_type(dtype)
+        itemsize = _itemsizes[key] = lldtype.get_abi_size(targetdata)
+        return itemsize
@@ -89,6 +89,34 @@ def sub_group_barrier():
     raise _stub_error
 
 
+def get_sub_group_local_id():
+    """
+    OpenCL 2.0 get_sub_group_local_id()
+    """
+    raise _stub_error
+
+
+def get_sub_group_id():
+    """
+    OpenCL 2.0 get_sub_group_id()
+    """
+    raise _stub_error
+
+
+def get_num_sub_groups():
+    """
+    OpenCL 2.0 get_num_sub_groups()
+    """
+    raise _stub_error
+
+
+def sub_group_reduce_add(*args, **kargs):
+    """
+    OpenCL 2.0 sub_group_reduce_add()
+    """
+    raise _stub_error
+
+
 class Stub(object):
     """A stub object to represent special objects which is meaningless
     outside the context of DPPY compilation context.
@@ -164,3 +192,23 @@ class atomic(Stub):
 
         .. note:: Supported on int32, int64, float32, float64 operands only.
         """
+
+    def min():
+        """min(ary, idx, val)
+
+        Perform atomic ary[idx] = min(ary[idx], val).
+
+        Returns the old value at the index location as if it is loaded atomically.
+
+        .. note:: Supported on int32, int64, float32, float64 operands only.
+        """
+
+    def max():
+        """max(ary, idx, val)
+
+        Perform atomic ary[idx] = max(ary[idx], val).
+
+        Returns the old value at the index location as if it is loaded atomically.
+
+        .. note:: Supported on int32, int64, float32, float64 operands only.
+        """
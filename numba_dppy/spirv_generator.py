@@ -14,8 +14,10 @@
 
 """A wrapper to connect to the SPIR-V binaries (Tools, Translator)."""
 
+import functools
 import os
 import shutil
+import subprocess
 import tempfile
 from subprocess import CalledProcessError, check_call
 
@@ -115,6 +117,23 @@ class CmdLine:
 
         return result
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def llvm_spirv_version():
+        """Return the version reported by the llvm-spirv executable.
+
+        The path of the executable is returned instead if it can not be run.
+        """
+        llvm_spirv_tool = CmdLine._llvm_spirv()
+        try:
+            return subprocess.check_output(
+                [llvm_spirv_tool, "--version"],
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+            ).strip()
+        except (OSError, CalledProcessError):
+            return llvm_spirv_tool
+
     def link(self, opath, binaries):
         """
         Link spirv modules.
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import contextlib
+import functools
 import shutil
 
 import dpctl
@@ -56,15 +57,17 @@ def has_sycl_platforms():
     return False
 
 
-def is_gen12(device_type):
-    with dpctl.device_context(device_type):
-        q = dpctl.get_current_queue()
-        device = q.get_sycl_device()
-        name = device.name
-        if "Gen12" in name:
-            return True
+@functools.lru_cache(maxsize=None)
+def get_device(filter_str):
+    """
+    Returns the ``dpctl.SyclDevice`` selected by ``filter_str``. The device
+    is created once per filter string and shared by all tests.
+    """
+    return dpctl.SyclDevice(filter_str)
+
 
-        return False
+def is_gen12(device_type):
+    return "Gen12" in get_device(device_type).name
 
 
 def platform_not_supported(device_type):
@@ -53,9 +53,12 @@ def input_arrays(request):
     return a, request.param
 
 
+# Every work-item applies the operation with 1 to an element starting at 0
 list_of_op = [
     ("add", N),
     ("sub", -N),
+    ("min", 0),
+    ("max", 1),
 ]
 
 
@@ -203,6 +206,8 @@ def skip_if_disabled(*args):
     [
         ("add", "__spirv_AtomicFAddEXT"),
         ("sub", "__spirv_AtomicFAddEXT"),
+        ("min", "__spirv_AtomicFMinEXT"),
+        ("max", "__spirv_AtomicFMaxEXT"),
     ],
 )
 @pytest.mark.parametrize("dtype", list_of_f_dtypes)
@@ -233,3 +238,4 @@ def test_atomic_fp_native(
             assert is_native_atomic == expected_native_atomic_for_device(
                 filter_str
             )
+
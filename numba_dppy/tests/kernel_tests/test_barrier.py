@@ -17,11 +17,15 @@ import platform
 import dpctl
 import numpy as np
 import pytest
+from numba.core.errors import NumbaError
 
 import numba_dppy as dppy
 from numba_dppy.tests._helper import filter_strings
 
 
+BLOCKSIZE = 10
+
+
 def skip_if_win():
     return platform.system == "Windows"
 
@@ -108,3 +112,43 @@ def test_local_memory(filter_str):
 
     expected = orig[::-1] + orig
     np.testing.assert_allclose(expected, arr)
+
+
+@pytest.mark.parametrize("filter_str", filter_strings)
+def test_local_memory_global_shape(filter_str):
+    if skip_if_win():
+        pytest.skip()
+
+    @dppy.kernel("void(float32[::1])")
+    def reverse_array(A):
+        # the shape is a global integer instead of a literal
+        lm = dppy.local.array(shape=BLOCKSIZE, dtype=np.float32)
+        i = dppy.get_global_id(0)
+
+        lm[i] = A[i]
+        dppy.barrier(dppy.CLK_LOCAL_MEM_FENCE)  # local mem fence
+        A[i] += lm[BLOCKSIZE - 1 - i]
+
+    arr = np.arange(BLOCKSIZE).astype(np.float32)
+    orig = arr.copy()
+
+    with dpctl.device_context(filter_str):
+        reverse_array[BLOCKSIZE, BLOCKSIZE](arr)
+
+    expected = orig[::-1] + orig
+    np.testing.assert_allclose(expected, arr)
+
+
+@pytest.mark.parametrize("filter_str", filter_strings)
+def test_local_memory_non_constant_shape(filter_str):
+    if skip_if_win():
+        pytest.skip()
+
+    def reverse_array(A, n):
+        # the shape is only known at runtime
+        lm = dppy.local.array(shape=n, dtype=np.float32)
+        i = dppy.get_global_id(0)
+        lm[i] = A[i]
+
+    with dpctl.device_context(filter_str), pytest.raises(NumbaError):
+        dppy.kernel("void(float32[::1], int64)")(reverse_array)
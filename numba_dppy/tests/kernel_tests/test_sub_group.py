@@ -0,0 +1,43 @@
+# Copyright 2021 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import dpctl
+import numpy as np
+import pytest
+
+import numba_dppy as dppy
+from numba_dppy.tests._helper import filter_strings
+
+list_of_dtypes = [np.int32, np.int64, np.float32, np.float64]
+
+
+@pytest.mark.parametrize("filter_str", filter_strings)
+@pytest.mark.parametrize("dtype", list_of_dtypes)
+def test_sub_group_reduce_add(filter_str, dtype):
+    @dppy.kernel
+    def sub_group_sums(A, R):
+        i = dppy.get_global_id(0)
+        s = dppy.sub_group_reduce_add(A[i])
+        # only the first work-item of every sub-group keeps the sum
+        if dppy.get_sub_group_local_id() == 0:
+            R[i] = s
+
+    N = 256
+    a = np.arange(N, dtype=dtype)
+    r = np.zeros(N, dtype=dtype)
+
+    with dpctl.device_context(filter_str):
+        sub_group_sums[N, 64](a, r)
+
+    np.testing.assert_allclose(r.sum(), a.sum())
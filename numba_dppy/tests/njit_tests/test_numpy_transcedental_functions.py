@@ -25,6 +25,7 @@ import numba_dppy as dppy
 from numba_dppy.tests._helper import (
     assert_auto_offloading,
     filter_strings,
+    get_device,
     is_gen12,
 )
 
@@ -86,7 +87,7 @@ list_of_dtypes = [
 ]
 
 
-@pytest.fixture(params=list_of_dtypes)
+@pytest.fixture(params=list_of_dtypes, scope="module")
 def input_arrays(request):
     # The size of input and out arrays to be used
     N = 2048
@@ -99,14 +100,12 @@ def input_arrays(request):
 def test_binary_ops(filter_str, binary_op, input_arrays):
     a, b = input_arrays
     binop = getattr(np, binary_op)
-    actual = np.empty(shape=a.shape, dtype=a.dtype)
-    expected = np.empty(shape=a.shape, dtype=a.dtype)
 
     @njit
     def f(a, b):
         return binop(a, b)
 
-    device = dpctl.SyclDevice(filter_str)
+    device = get_device(filter_str)
     with dpctl.device_context(device), assert_auto_offloading():
         actual = f(a, b)
 
@@ -123,14 +122,12 @@ def test_unary_ops(filter_str, unary_op, input_arrays):
 
     a = input_arrays[0]
     uop = getattr(np, unary_op)
-    actual = np.empty(shape=a.shape, dtype=a.dtype)
-    expected = np.empty(shape=a.shape, dtype=a.dtype)
 
     @njit
     def f(a):
         return uop(a)
 
-    device = dpctl.SyclDevice(filter_str)
+    device = get_device(filter_str)
     with dpctl.device_context(device), assert_auto_offloading():
         actual = f(a)
 
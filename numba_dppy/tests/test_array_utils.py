@@ -64,3 +64,20 @@ def test_as_usm_obj(filter_str):
         usm_mem = as_usm_obj(b, queue=queue, copy=False)
         copy_to_numpy_from_usm_obj(usm_mem, b_copy)
         assert np.any(np.not_equal(b, b_copy))
+
+
+@pytest.mark.parametrize("filter_str", filter_strings)
+def test_as_usm_obj_out(filter_str):
+    a = np.arange(1023, dtype=np.float32)
+
+    with dpctl.device_context(filter_str) as queue:
+        out = dpctl_mem.MemoryUSMShared(a.nbytes, queue=queue)
+        usm_mem = as_usm_obj(a, queue=queue, out=out)
+        assert usm_mem._pointer == out._pointer
+
+        a_copy = np.empty_like(a)
+        copy_to_numpy_from_usm_obj(usm_mem, a_copy)
+        assert np.all(a == a_copy)
+
+        with pytest.raises(ValueError):
+            as_usm_obj(a[:-1], queue=queue, out=out)
@@ -0,0 +1,104 @@
+# Copyright 2021 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import dpctl
+import numpy as np
+from numba import njit, prange
+
+from numba_dppy.core.passes import dppy_lowerer
+from numba_dppy.tests._helper import skip_no_opencl_gpu
+
+
+def prange_example(a, b):
+    c = np.empty_like(a)
+    for i in prange(a.shape[0]):
+        c[i] = a[i] + b[i]
+
+    return c
+
+
+def make_add_constant(constant):
+    def add_constant(a):
+        c = np.empty_like(a)
+        for i in prange(a.shape[0]):
+            c[i] = a[i] + constant[i]
+
+        return c
+
+    return add_constant
+
+
+def make_scale(factor):
+    def scale(a):
+        c = np.empty_like(a)
+        for i in prange(a.shape[0]):
+            c[i] = a[i] * factor
+
+        return c
+
+    return scale
+
+
+@skip_no_opencl_gpu
+class TestParforKernelCache:
+    def test_identical_parfor_is_compiled_once(self):
+        a = np.arange(10, dtype=np.float64)
+        b = np.ones(10, dtype=np.float64)
+
+        device = dpctl.SyclDevice("opencl:gpu")
+        with dpctl.device_context(device):
+            expected = njit(prange_example)(a, b)
+            num_cached = len(dppy_lowerer._PARFOR_KERNEL_CACHE)
+
+            # A new dispatcher lowers the same parfor again
+            got = njit(prange_example)(a, b)
+
+        assert len(dppy_lowerer._PARFOR_KERNEL_CACHE) == num_cached
+        np.testing.assert_equal(got, expected)
+
+    def test_different_constant_arrays_are_not_shared(self):
+        # NumPy prints both constants as [0. 0. 0. ... 0. 0. 0.]
+        N = 2000
+        a = np.zeros(N, dtype=np.float64)
+        c1 = np.zeros(N, dtype=np.float64)
+        c2 = np.zeros(N, dtype=np.float64)
+        c2[N // 2] = 1.0
+
+        device = dpctl.SyclDevice("opencl:gpu")
+        with dpctl.device_context(device):
+            got1 = njit(make_add_constant(c1))(a)
+            num_cached = len(dppy_lowerer._PARFOR_KERNEL_CACHE)
+
+            got2 = njit(make_add_constant(c2))(a)
+
+        assert len(dppy_lowerer._PARFOR_KERNEL_CACHE) == num_cached + 1
+        np.testing.assert_equal(got1, a + c1)
+        np.testing.assert_equal(got2, a + c2)
+
+    def test_different_scalar_constant_types_are_not_shared(self):
+        # Both constants are dumped as 0.1 in the IR
+        a = np.arange(10, dtype=np.float64)
+        factor32 = np.float32(0.1)
+        factor64 = 0.1
+
+        device = dpctl.SyclDevice("opencl:gpu")
+        with dpctl.device_context(device):
+            got32 = njit(make_scale(factor32))(a)
+            num_cached = len(dppy_lowerer._PARFOR_KERNEL_CACHE)
+
+            got64 = njit(make_scale(factor64))(a)
+
+        assert len(dppy_lowerer._PARFOR_KERNEL_CACHE) == num_cached + 1
+        np.testing.assert_equal(got32, a * factor32)
+        np.testing.assert_equal(got64, a * factor64)
@@ -62,6 +62,42 @@ class TestPrange:
 
         assert np.all(b == 10)
 
+    def test_nested_prange_in_branchy_body(self):
+        @njit
+        def f(a, b):
+            # dimensions must be provided as scalar
+            m, n = a.shape
+            for i in prange(m):
+                for j in prange(n):
+                    b[i, j] = a[i, j] * 10
+                # The branches add enough blocks to the outer body for its
+                # labels to reach the labels of the inner parfor.
+                if i % 2 == 0:
+                    b[i, 0] += 1
+                if i % 3 == 0:
+                    b[i, 1] += 2
+                if i % 4 == 0:
+                    b[i, 2] += 3
+                if i % 5 == 0:
+                    b[i, 3] += 4
+                if i % 6 == 0:
+                    b[i, 4] += 5
+                if i % 7 == 0:
+                    b[i, 5] += 6
+
+        m = 8
+        n = 8
+        a = np.arange(m * n, dtype=np.float64).reshape((m, n))
+        b = np.ones((m, n))
+        expected = np.ones((m, n))
+        f.py_func(a, expected)
+
+        device = dpctl.SyclDevice("opencl:gpu")
+        with assert_auto_offloading(), dpctl.device_context(device):
+            f(a, b)
+
+        np.testing.assert_equal(b, expected)
+
     def test_multiple_prange(self):
         @njit
         def f(a, b):
@@ -40,7 +40,7 @@ class TestDPPYSumReduction:
         A = np.array(np.random.random(N), dtype=np.float32)
         A_copy = A.copy()
         # at max we will require half the size of A to store sum
-        R = np.array(np.random.random(math.ceil(N / 2)), dtype=np.float32)
+        R = np.empty(math.ceil(N / 2), dtype=np.float32)
 
         device = dpctl.SyclDevice("opencl:gpu")
         with dpctl.device_context(device):
@@ -14,6 +14,9 @@
 
 """This module provides utilities to interact with USM memory."""
 
+import functools
+from math import prod
+
 import dpctl
 import dpctl.memory as dpctl_mem
 import numpy as np
@@ -29,6 +32,26 @@ supported_numpy_dtype = [
     np.float64,
 ]
 
+_supported_np_dtypes = frozenset(np.dtype(typ) for typ in supported_numpy_dtype)
+
+# usm_type -> dpctl memory class used by as_usm_obj
+_usm_memory_types = {
+    "shared": dpctl_mem.MemoryUSMShared,
+    "device": dpctl_mem.MemoryUSMDevice,
+    "host": dpctl_mem.MemoryUSMHost,
+}
+
+# USM memory that can be read from the host without a queue copy
+_host_accessible_usm_types = (
+    dpctl_mem.MemoryUSMShared,
+    dpctl_mem.MemoryUSMHost,
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _dtype_from_typestr(typestr):
+    return np.dtype(typestr)
+
 
 def get_info_from_suai(obj):
     """
@@ -50,12 +73,13 @@ def get_info_from_suai(obj):
 
     assert usm_mem is not None
 
-    shape = obj.__sycl_usm_array_interface__["shape"]
-    total_size = np.prod(obj.__sycl_usm_array_interface__["shape"])
-    ndim = len(obj.__sycl_usm_array_interface__["shape"])
-    itemsize = np.dtype(obj.__sycl_usm_array_interface__["typestr"]).itemsize
-    dtype = np.dtype(obj.__sycl_usm_array_interface__["typestr"])
-    strides = obj.__sycl_usm_array_interface__["strides"]
+    suai = obj.__sycl_usm_array_interface__
+    shape = suai["shape"]
+    total_size = prod(shape)
+    ndim = len(shape)
+    dtype = _dtype_from_typestr(suai["typestr"])
+    itemsize = dtype.itemsize
+    strides = suai["strides"]
     if strides is None:
         strides = [1] * ndim
         for i in reversed(range(1, ndim)):
@@ -80,19 +104,19 @@ def has_usm_memory(obj):
         A Python object allocated using USM memory if argument is already
         allocated using USM (zero-copy), None otherwise.
     """
+    # Probe for the interface first, plain numpy.ndarrays are the common
+    # case and would otherwise always go through an exception.
+    if not hasattr(obj, "__sycl_usm_array_interface__"):
+        obj = getattr(obj, "base", None)
+        if not hasattr(obj, "__sycl_usm_array_interface__"):
+            return None
+
     usm_mem = None
     try:
         usm_mem = dpctl_mem.as_usm_memory(obj)
     except Exception as e:
-        if hasattr(obj, "base"):
-            try:
-                usm_mem = dpctl_mem.as_usm_memory(obj.base)
-            except Exception as e:
-                if config.DEBUG:
-                    print(e)
-        else:
-            if config.DEBUG:
-                print(e)
+        if config.DEBUG:
+            print(e)
 
     return usm_mem
 
@@ -129,7 +153,7 @@ def copy_from_numpy_to_usm_obj(usm_allocated, obj):
             "numpy.ndarray. Obj type: %s" % (type(obj))
         )
 
-    if obj.dtype not in [np.dtype(typ) for typ in supported_numpy_dtype]:
+    if obj.dtype not in _supported_np_dtypes:
         raise ValueError(
             "dtype is not supprted. Supported dtypes "
             "are: %s" % (supported_numpy_dtype)
@@ -140,14 +164,22 @@ def copy_from_numpy_to_usm_obj(usm_allocated, obj):
             "Only C-contiguous numpy.ndarray is currently supported!"
         )
 
-    size = np.prod(obj.shape)
-    if usm_mem.size != (obj.dtype.itemsize * size):
+    if usm_mem.size != obj.nbytes:
         raise ValueError(
             "Size (Bytes) of data does not match. USM allocated "
             "memory size %d, supported object size: %d"
-            % (usm_mem.size, (obj.dtype.itemsize * size))
+            % (usm_mem.size, obj.nbytes)
         )
 
+    _copy_from_numpy_to_usm_mem(usm_mem, obj)
+
+
+def _copy_from_numpy_to_usm_mem(usm_mem, obj):
+    """
+    Copy a C-contiguous numpy.ndarray into USM memory of matching size.
+
+    The arguments are not validated, callers are expected to have done so.
+    """
     obj_memview = memoryview(obj)
     obj_memview = obj_memview.cast("B")
     usm_mem.copy_from_host(obj_memview)
@@ -178,26 +210,39 @@ def copy_to_numpy_from_usm_obj(usm_allocated, obj):
             "numpy.ndarray. Obj type: %s" % (type(obj))
         )
 
-    if obj.dtype not in [np.dtype(typ) for typ in supported_numpy_dtype]:
+    if obj.dtype not in _supported_np_dtypes:
         raise ValueError(
             "dtype is not supprted. Supported dtypes "
             "are: %s" % (supported_numpy_dtype)
         )
 
-    size = np.prod(obj.shape)
-    if usm_mem.size != (obj.dtype.itemsize * size):
+    if usm_mem.size != obj.nbytes:
         raise ValueError(
             "Size (Bytes) of data does not match. USM allocated "
             "memory size %d, supported object size: %d"
-            % (usm_mem.size, (obj.dtype.itemsize * size))
+            % (usm_mem.size, obj.nbytes)
         )
 
-    obj_memview = memoryview(obj)
-    obj_memview = obj_memview.cast("B")
-    usm_mem.copy_to_host(obj_memview)
+    _copy_to_numpy_from_usm_mem(usm_mem, obj)
+
+
+def _copy_to_numpy_from_usm_mem(usm_mem, obj):
+    """
+    Copy USM memory into a numpy.ndarray of matching size.
+
+    The arguments are not validated, callers are expected to have done so.
+    """
+    if isinstance(usm_mem, _host_accessible_usm_types):
+        # Host and shared USM can be read in place, let NumPy do the copy
+        usm_view = np.ndarray(obj.shape, dtype=obj.dtype, buffer=usm_mem)
+        np.copyto(obj, usm_view, casting="no")
+    else:
+        obj_memview = memoryview(obj)
+        obj_memview = obj_memview.cast("B")
+        usm_mem.copy_to_host(obj_memview)
 
 
-def as_usm_obj(obj, queue=None, usm_type="shared", copy=True):
+def as_usm_obj(obj, queue=None, usm_type="shared", copy=True, out=None):
     """
     Determine and return a SYCL device accesible object.
 
@@ -213,6 +258,9 @@ def as_usm_obj(obj, queue=None, usm_type="shared", copy=True):
         queue (dpctl.SyclQueue): SYCL queue to be used to allocate USM
             memory in case obj is not already USM allocated.
         copy (bool): Flag to determine if we copy data from obj.
+        out: Optional USM allocated object of the same size in bytes as
+            obj. If given, it is used instead of allocating new USM memory
+            in case obj is not already USM allocated.
 
     Returns:
         A Python object allocated using USM memory.
@@ -222,12 +270,14 @@ def as_usm_obj(obj, queue=None, usm_type="shared", copy=True):
             1. If obj is not allocated on USM memory or is not of type
                numpy.ndarray, TypeError is raised.
             2. If queue is not of type dpctl.SyclQueue.
+            3. If out is not USM allocated.
         ValueError:
             1. In case obj is not USM allocated, users need to pass
                the SYCL queue to be used for creating new memory. ValuieError
                is raised if queue argument is not provided.
             2. If usm_type is not valid.
             3. If dtype of the passed ndarray(obj) is not supported.
+            4. If size of out does not match.
     """
     usm_mem = has_usm_memory(obj)
 
@@ -247,33 +297,41 @@ def as_usm_obj(obj, queue=None, usm_type="shared", copy=True):
                 "numpy.ndarray. Obj type: %s" % (type(obj))
             )
 
-        if obj.dtype not in [np.dtype(typ) for typ in supported_numpy_dtype]:
+        if obj.dtype not in _supported_np_dtypes:
             raise ValueError(
                 "dtype is not supprted. Supported dtypes "
                 "are: %s" % (supported_numpy_dtype)
             )
 
-        size = np.prod(obj.shape)
-        if usm_type == "shared":
-            usm_mem = dpctl_mem.MemoryUSMShared(
-                size * obj.dtype.itemsize, queue=queue
-            )
-        elif usm_type == "device":
-            usm_mem = dpctl_mem.MemoryUSMDevice(
-                size * obj.dtype.itemsize, queue=queue
-            )
-        elif usm_type == "host":
-            usm_mem = dpctl_mem.MemoryUSMHost(
-                size * obj.dtype.itemsize, queue=queue
-            )
+        if out is not None:
+            usm_mem = has_usm_memory(out)
+            if usm_mem is None:
+                raise TypeError("out is not USM allocated.")
+            if usm_mem.size != obj.nbytes:
+                raise ValueError(
+                    "Size (Bytes) of data does not match. USM allocated "
+                    "memory size %d, supported object size: %d"
+                    % (usm_mem.size, obj.nbytes)
+                )
         else:
-            raise ValueError(
-                "Supported usm_type are: 'shared', "
-                "'device' and 'host'. Provided: %s" % (usm_type)
-            )
+            try:
+                usm_memory_type = _usm_memory_types[usm_type]
+            except KeyError:
+                raise ValueError(
+                    "Supported usm_type are: 'shared', "
+                    "'device' and 'host'. Provided: %s" % (usm_type)
+                ) from None
+
+            usm_mem = usm_memory_type(obj.nbytes, queue=queue)
 
         if copy:
-            # Copy data from numpy.ndarray
-            copy_from_numpy_to_usm_obj(usm_mem, obj)
+            if not obj.flags.c_contiguous:
+                raise ValueError(
+                    "Only C-contiguous numpy.ndarray is currently supported!"
+                )
+            # Copy data from numpy.ndarray, usm_mem was allocated or checked
+            # above to match obj so the checks of copy_from_numpy_to_usm_obj
+            # are not repeated.
+            _copy_from_numpy_to_usm_mem(usm_mem, obj)
 
     return usm_mem
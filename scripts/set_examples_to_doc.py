@@ -1,44 +1,48 @@
 """ This script is needed to convert gdb scripts from commands to documentation
 """
 import os
+from pathlib import Path
+
+# gdb commands that only drive the test run and are left out of the docs
+SKIP_PREFIXES = (
+    "# Expected",
+    "echo Done",
+    "quit",
+    "set trace-commands",
+    "set pagination",
+)
 
 
 def convert_commands_to_docs():
-    commands_dir = os.getcwd() + "/numba_dppy/examples/debug/commands"
-    examples = os.listdir(commands_dir)
-    os.chdir(commands_dir + "/docs")
-    for file in examples:
-        if file != "docs":
-            open_file = open(commands_dir + "/" + file, "r")
-            read_lines = open_file.readlines()
-            if os.path.exists(file):
-                os.remove(file)
-            write_file = open(file, "a")
-            for line in read_lines:
-                if (
-                    line.startswith("# Expected")
-                    or line.startswith("echo Done")
-                    or line.startswith("quit")
-                    or line.startswith("set trace-commands")
-                    or line.startswith("set pagination")
-                ):
+    commands_dir = Path.cwd() / "numba_dppy/examples/debug/commands"
+    docs_dir = commands_dir / "docs"
+    for command_file in commands_dir.iterdir():
+        if not command_file.is_file():
+            continue
+        doc_file = docs_dir / command_file.name
+        # Write next to the doc and rename it into place once complete
+        tmp_file = doc_file.with_name(doc_file.name + ".tmp")
+        with open(command_file, "r") as src, open(tmp_file, "w") as dst:
+            for line in src:
+                if line.startswith(SKIP_PREFIXES):
                     continue
                 if line.startswith("# Run: "):
-                    line = line.replace("# Run:", "$")
-                    words = line.split()
-                    for i in range(len(words)):
-                        if words[i] == "-command" or words[i].startswith(
-                            "commands"
-                        ):
-                            words[i] = ""
-                    line = " ".join(words)
-                    line = " ".join(line.split()) + "\n"
+                    # Drop the gdb -command option and the commands file
+                    words = line.replace("# Run:", "$").split()
+                    line = " ".join(
+                        word
+                        for word in words
+                        if word != "-command"
+                        and not word.startswith("commands")
+                    )
+                    line += "\n"
                 elif line.startswith("# "):
                     line = line.replace("# ", "")
                 else:
                     line = "(gdb) " + line
 
-                write_file.write(line)
+                dst.write(line)
+        os.replace(tmp_file, doc_file)
 
 
 if __name__ == "__main__":